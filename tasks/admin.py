@@ -1,11 +1,52 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.utils.functional import cached_property
 from .models import Tenant, Task, TaskResult
 
 
+class EstimatedCountPaginator(Paginator):
+	"""Paginator that reads the planner's row estimate for unfiltered changelists.
+
+	An exact COUNT(*) is a full scan on PostgreSQL; when no filter or search is
+	applied the pg_class estimate is good enough for page links. Filtered
+	querysets and other backends fall back to the exact count.
+	"""
+
+	@cached_property
+	def count(self):
+		query = getattr(self.object_list, 'query', None)
+		if query is None or query.where:
+			return super().count
+		connection = connections[self.object_list.db]
+		if connection.vendor != 'postgresql':
+			return super().count
+		with connection.cursor() as cursor:
+			cursor.execute(
+				'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+				[self.object_list.model._meta.db_table],
+			)
+			row = cursor.fetchone()
+		# reltuples is -1 (or 0) until the table has been analyzed
+		if not row or row[0] <= 0:
+			return super().count
+		return row[0]
+
+
+def _with_duration(queryset):
+	"""Annotate completed_at - started_at so the changelist doesn't compute it per row."""
+	return queryset.annotate(_duration=ExpressionWrapper(
+		F('completed_at') - F('started_at'), output_field=DurationField()
+	))
+
+
 @admin.register(Tenant)
 class TenantAdmin(admin.ModelAdmin):
 	list_display = ['key', 'name', 'created_at']
 	search_fields = ['key', 'name']
+	sortable_by = ('key',)
+	ordering = ('key',)
 
 
 @admin.register(Task)
@@ -15,10 +56,17 @@ class TaskAdmin(admin.ModelAdmin):
 	search_fields = ['title', 'description']
 	filter_horizontal = ['dependencies']
 	readonly_fields = ['created_at', 'updated_at', 'started_at', 'completed_at']
+	list_select_related = ('workspace',)
+	sortable_by = ('id', 'created_at')
+	ordering = ('-created_at',)
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+
+	def get_queryset(self, request):
+		return _with_duration(super().get_queryset(request))
 
 	def duration_display(self, obj):
-		dur = obj.duration_seconds()
-		return f'{dur:.2f}s' if dur else '—'
+		return f'{obj._duration.total_seconds():.2f}s' if obj._duration else '—'
 	duration_display.short_description = 'Duration'
 
 
@@ -28,8 +76,27 @@ class TaskResultAdmin(admin.ModelAdmin):
 	list_filter = ['status', 'started_at']
 	search_fields = ['task__title', 'error_message']
 	readonly_fields = ['task', 'started_at', 'completed_at', 'output', 'error_message']
+	sortable_by = ('started_at',)
+	ordering = ('-started_at',)
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+
+	def get_queryset(self, request):
+		# TaskResult.__str__ and the task column both touch the related task;
+		# output/error_message can be large and are only shown on the change form
+		return _with_duration(
+			super().get_queryset(request)
+			.select_related('task', 'task__workspace')
+			.defer('output', 'error_message')
+		)
+
+	def get_object(self, request, object_id, from_field=None):
+		obj = super().get_object(request, object_id, from_field)
+		if obj is not None:
+			# Load both deferred columns together instead of one query each
+			obj.refresh_from_db(fields=['output', 'error_message'])
+		return obj
 
 	def duration_display(self, obj):
-		dur = obj.duration_seconds()
-		return f'{dur:.2f}s' if dur else '—'
+		return f'{obj._duration.total_seconds():.2f}s' if obj._duration else '—'
 	duration_display.short_description = 'Duration'
@@ -1,20 +1,178 @@
+import asyncio
+import json
+import logging
+from functools import lru_cache
+
+import msgpack
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def workspace_group(workspace_key):
+    """Return the channel-layer group name for a workspace.
+
+    Memoized so producers and consumers reuse one string per workspace
+    instead of formatting it for every message.
+    """
+    return f'workspace_{workspace_key}'
+
+
+def msgpack_frame(event):
+    """Return an update event's JSON frame re-encoded as msgpack.
+
+    The relay hands one event dict to every local consumer of a group, so the
+    packed bytes are stored on it and later msgpack sockets reuse them.
+    """
+    packed = event.get('packed')
+    if packed is None:
+        packed = event['packed'] = msgpack.packb(json.loads(event['frame']), use_bin_type=True)
+    return packed
+
+
+class GroupRelay:
+    """Joins each workspace group once per process and fans out locally.
+
+    Without the relay every socket adds its own channel to the group, so a
+    group_send publishes one message per connected socket. Here the first
+    local consumer of a group adds a single relay channel; messages received
+    on it are queued for every consumer of that group in this process, and
+    each consumer drains its own queue so a slow socket delays only itself.
+    """
+
+    # Seconds to wait before resubscribing after the layer fails a receive
+    retry_delay = 1
+    # Messages a consumer may fall behind by before new ones are dropped
+    max_backlog = 1000
+
+    def __init__(self):
+        # group -> {consumer: (queue, sender task)}
+        self.members = {}
+        # group -> (layer, channel, reader task, refresh task)
+        self.readers = {}
+
+    async def join(self, group, consumer):
+        members = self.members.get(group)
+        if members is None:
+            members = self.members[group] = {}
+            members[consumer] = self._start_sender(consumer)
+            layer = consumer.channel_layer
+            try:
+                channel = await layer.new_channel('relay.')
+                await layer.group_add(group, channel)
+            except Exception:
+                # Forget the half-set-up group so the next join subscribes
+                # from scratch instead of finding members without a reader
+                for _, sender in self.members.pop(group, {}).values():
+                    sender.cancel()
+                raise
+            self.readers[group] = (
+                layer,
+                channel,
+                asyncio.ensure_future(self._read(group, layer, channel)),
+                asyncio.ensure_future(self._refresh(group, layer, channel)),
+            )
+            if not members:
+                # Every consumer left while the relay channel was being set up
+                await self.leave(group, consumer)
+        else:
+            members[consumer] = self._start_sender(consumer)
+            if group in self.readers:
+                # Renews the relay channel's group membership, which the layer
+                # expires after group_expiry
+                layer, channel, _, _ = self.readers[group]
+                await layer.group_add(group, channel)
+
+    async def leave(self, group, consumer):
+        members = self.members.get(group)
+        if members is None:
+            return
+        sender = members.pop(consumer, None)
+        if sender is not None:
+            sender[1].cancel()
+        if members or group not in self.readers:
+            return
+        del self.members[group]
+        layer, channel, reader, refresher = self.readers.pop(group)
+        reader.cancel()
+        refresher.cancel()
+        await layer.group_discard(group, channel)
+
+    def _start_sender(self, consumer):
+        queue = asyncio.Queue(maxsize=self.max_backlog)
+        return queue, asyncio.ensure_future(self._send(consumer, queue))
+
+    async def _send(self, consumer, queue):
+        while True:
+            message = await queue.get()
+            try:
+                await consumer.dispatch(message)
+            except Exception:
+                # Keep draining; a closed socket is removed by its disconnect
+                logger.exception('Failed to deliver %s to a consumer', message.get('type'))
+
+    async def _read(self, group, layer, channel):
+        while True:
+            try:
+                message = await layer.receive(channel)
+            except Exception:
+                # A layer error (e.g. a dropped Redis connection) must not end
+                # delivery for every local socket in the group; wait, make
+                # sure the relay channel is still subscribed and carry on
+                logger.exception('Relay receive failed for %s; resubscribing', group)
+                await asyncio.sleep(self.retry_delay)
+                try:
+                    await layer.group_add(group, channel)
+                except Exception:
+                    logger.exception('Relay resubscribe failed for %s', group)
+                continue
+            for queue, _ in self.members.get(group, {}).values():
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    logger.warning('Dropped %s for a consumer of %s that is falling behind', message.get('type'), group)
+
+    async def _refresh(self, group, layer, channel):
+        # The layer drops group membership after group_expiry (24 hours by
+        # default on channels_redis); re-adding well before that keeps the
+        # relay subscribed for as long as the process has local members
+        interval = getattr(layer, 'group_expiry', 86400) / 2
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await layer.group_add(group, channel)
+            except Exception:
+                logger.exception('Relay membership refresh failed for %s', group)
+
+
+relay = GroupRelay()
+
 
 class WorkspaceConsumer(AsyncJsonWebsocketConsumer):
+    """Streams task updates for one workspace.
+
+    Clients that offer the `msgpack` subprotocol get binary msgpack frames;
+    everyone else gets JSON text frames.
+    """
+
     async def connect(self):
         self.workspace = self.scope['url_route']['kwargs']['workspace']
-        self.group_name = f'workspace_{self.workspace}'
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        self.group_name = workspace_group(self.workspace)
+        self.binary = 'msgpack' in self.scope.get('subprotocols', ())
+        await relay.join(self.group_name, self)
+        await self.accept('msgpack' if self.binary else None)
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        await relay.leave(self.group_name, self)
 
     async def receive_json(self, content, **kwargs):
         # Accept client messages if needed for control; ignore by default
         pass
 
     async def task_update(self, event):
-        # Event shape: {'type': 'task_update', 'payload': {...}}
-        await self.send_json(event.get('payload', {}))
+        # Event shape: {'type': 'task_update', 'frame': '<json>'}
+        if self.binary:
+            await self.send(bytes_data=msgpack_frame(event))
+        else:
+            await self.send(text_data=event['frame'])
@@ -1,4 +1,29 @@
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _build_shard_lookup(shard_map):
+    """Place each (key, alias) pair in its own slot of a power-of-two table.
+
+    Returns (table, mask) such that `table[hash(key) & mask]` holds the entry
+    for every configured key; the table is grown until no two keys collide.
+    """
+    for bits in range(max(len(shard_map), 1).bit_length(), 21):
+        mask = (1 << bits) - 1
+        table = [None] * (mask + 1)
+        for key, alias in shard_map.items():
+            slot = hash(key) & mask
+            if table[slot] is not None:
+                break
+            table[slot] = (key, alias)
+        else:
+            return tuple(table), mask
+    raise ImproperlyConfigured('SHARD_MAP keys could not be placed without collisions')
+
+
+# Resolved once at import; the router runs on every ORM query.
+_SHARD_LOOKUP, _SHARD_MASK = _build_shard_lookup(getattr(settings, 'SHARD_MAP', {}))
+_TASKS_LABEL = 'tasks'
 
 
 class TenantShardRouter:
@@ -12,10 +37,13 @@ class TenantShardRouter:
     def _db_for_workspace(self, workspace_key):
         if not workspace_key:
             return None
-        return settings.SHARD_MAP.get(workspace_key)
+        entry = _SHARD_LOOKUP[hash(workspace_key) & _SHARD_MASK]
+        if entry is not None and entry[0] == workspace_key:
+            return entry[1]
+        return None
 
     def db_for_read(self, model, **hints):
-        if model._meta.app_label != 'tasks':
+        if model._meta.app_label != _TASKS_LABEL:
             return None
         workspace = hints.get('workspace')
         return self._db_for_workspace(workspace)
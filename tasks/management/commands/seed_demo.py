@@ -1,14 +1,25 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
-from tasks.models import Tenant, Task
-from tasks.utils import topological_sort
-from tasks.tasks import execute_task
+from tasks.models import Task
+from tasks.seeding import add_dependencies, clear_tasks, get_or_create_tenants
+from tasks.utils import topological_levels
+from tasks.tasks import dispatch_levels
 from datetime import timedelta
 
 
 class Command(BaseCommand):
     help = 'Seed demo workspace and tasks to demonstrate DAG + Celery execution'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dispatch',
+            action='store_true',
+            help='Enqueue the demo_workspace DAG on Celery once the seed is committed',
+        )
+
+    @transaction.atomic
     def handle(self, *args, **options):
         # Create multiple workspaces
         workspaces = [
@@ -17,12 +28,14 @@ class Command(BaseCommand):
             ('project_beta', 'Project Beta'),
         ]
         
-        for ws_key, ws_name in workspaces:
-            ws, created = Tenant.objects.get_or_create(key=ws_key, defaults={'name': ws_name})
+        tenants, created_keys = get_or_create_tenants(workspaces)
+
+        for ws_key, _ in workspaces:
+            ws, created = tenants[ws_key], ws_key in created_keys
             self.stdout.write(f"{'Created' if created else 'Using'} workspace: {ws.key}")
             
             # Clear existing tasks for this workspace
-            Task.objects.filter(workspace=ws).delete()
+            clear_tasks(Task.objects.filter(workspace=ws))
             
             # Create demo tasks with different statuses and descriptions
             if ws_key == 'demo_workspace':
@@ -32,38 +45,59 @@ class Command(BaseCommand):
             elif ws_key == 'project_beta':
                 self._seed_project_beta(ws)
 
+        if options['dispatch']:
+            # Workers must not pick up tasks before the seed transaction commits
+            demo_ws = tenants['demo_workspace']
+            transaction.on_commit(lambda: self._dispatch(demo_ws))
+
+    def _dispatch(self, ws):
+        """Enqueue a workspace's tasks level by level in DAG order."""
+        tasks = (
+            Task.objects.filter(workspace=ws)
+            .only('id')
+            .prefetch_related(Prefetch('dependencies', queryset=Task.objects.only('id')))
+        )
+        levels = topological_levels(tasks)
+        dispatch_levels(levels)
+        self.stdout.write(f"✓ Enqueued {sum(len(level) for level in levels)} tasks in {len(levels)} levels")
+
     def _seed_demo_workspace(self, ws):
         """Seed demo_workspace with pending tasks (DAG structure)"""
         # Task graph: A -> B -> D, A -> C -> D (diamond)
-        task_a = Task.objects.create(
-            title='Task A (Start)',
-            description='Initial task that kicks off the workflow',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
-        task_b = Task.objects.create(
-            title='Task B (Data Processing)',
-            description='Process data from Task A',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
-        task_c = Task.objects.create(
-            title='Task C (Validation)',
-            description='Validate results from Task A',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
-        task_d = Task.objects.create(
-            title='Task D (Finalize)',
-            description='Combine results from B and C',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
+        task_a, task_b, task_c, task_d = Task.objects.bulk_create([
+            Task(
+                title='Task A (Start)',
+                description='Initial task that kicks off the workflow',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+            Task(
+                title='Task B (Data Processing)',
+                description='Process data from Task A',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+            Task(
+                title='Task C (Validation)',
+                description='Validate results from Task A',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+            Task(
+                title='Task D (Finalize)',
+                description='Combine results from B and C',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+        ])
         
         # Set dependencies
-        task_b.dependencies.add(task_a)
-        task_c.dependencies.add(task_a)
-        task_d.dependencies.add(task_b, task_c)
+        add_dependencies([
+            (task_b, task_a),
+            (task_c, task_a),
+            (task_d, task_b),
+            (task_d, task_c),
+        ])
         
         self.stdout.write(f"✓ Created DAG tasks: {task_a.id}, {task_b.id}, {task_c.id}, {task_d.id}")
 
@@ -72,53 +106,53 @@ class Command(BaseCommand):
         # Create tasks with different statuses
         now = timezone.now()
         
-        # Done tasks
-        task1 = Task.objects.create(
-            title='Deploy to Staging',
-            description='Deploy application to staging environment',
-            workspace=ws,
-            status=Task.STATUS_DONE,
-            started_at=now - timedelta(hours=2),
-            completed_at=now - timedelta(hours=1.5)
-        )
-        
-        task2 = Task.objects.create(
-            title='Run Tests',
-            description='Execute all unit and integration tests',
-            workspace=ws,
-            status=Task.STATUS_DONE,
-            started_at=now - timedelta(hours=1.5),
-            completed_at=now - timedelta(hours=1)
-        )
-        
-        # Running task
-        task3 = Task.objects.create(
-            title='Load Testing',
-            description='Perform load and stress testing',
-            workspace=ws,
-            status=Task.STATUS_RUNNING,
-            started_at=now - timedelta(minutes=30)
-        )
-        
-        # Pending tasks
-        task4 = Task.objects.create(
-            title='Deploy to Production',
-            description='Deploy to production after approval',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
-        
-        task5 = Task.objects.create(
-            title='Smoke Tests',
-            description='Run smoke tests on production',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
+        task1, task2, task3, task4, task5 = Task.objects.bulk_create([
+            # Done tasks
+            Task(
+                title='Deploy to Staging',
+                description='Deploy application to staging environment',
+                workspace=ws,
+                status=Task.STATUS_DONE,
+                started_at=now - timedelta(hours=2),
+                completed_at=now - timedelta(hours=1.5)
+            ),
+            Task(
+                title='Run Tests',
+                description='Execute all unit and integration tests',
+                workspace=ws,
+                status=Task.STATUS_DONE,
+                started_at=now - timedelta(hours=1.5),
+                completed_at=now - timedelta(hours=1)
+            ),
+            # Running task
+            Task(
+                title='Load Testing',
+                description='Perform load and stress testing',
+                workspace=ws,
+                status=Task.STATUS_RUNNING,
+                started_at=now - timedelta(minutes=30)
+            ),
+            # Pending tasks
+            Task(
+                title='Deploy to Production',
+                description='Deploy to production after approval',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+            Task(
+                title='Smoke Tests',
+                description='Run smoke tests on production',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+        ])
         
         # Set dependencies
-        task3.dependencies.add(task2)
-        task4.dependencies.add(task3)
-        task5.dependencies.add(task4)
+        add_dependencies([
+            (task3, task2),
+            (task4, task3),
+            (task5, task4),
+        ])
         
         self.stdout.write(f"✓ Created Project Alpha with mixed statuses: {task1.id}-{task5.id}")
 
@@ -126,39 +160,38 @@ class Command(BaseCommand):
         """Seed project_beta with various tasks"""
         now = timezone.now()
         
-        # Failed task
-        task_fail = Task.objects.create(
-            title='Data Migration',
-            description='Migrate legacy database to new schema',
-            workspace=ws,
-            status=Task.STATUS_FAILED,
-            started_at=now - timedelta(hours=3),
-            completed_at=now - timedelta(hours=2.5)
-        )
-        
-        # Retry task
-        task_retry = Task.objects.create(
-            title='Data Migration (Retry)',
-            description='Re-attempt database migration with fixes',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
-        task_retry.dependencies.add(task_fail)
-        
-        # Pending tasks
-        task_email = Task.objects.create(
-            title='Send Notifications',
-            description='Notify users of system changes',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
-        
-        task_docs = Task.objects.create(
-            title='Update Documentation',
-            description='Update API docs and user guides',
-            workspace=ws,
-            status=Task.STATUS_PENDING
-        )
+        task_fail, task_retry, task_email, task_docs = Task.objects.bulk_create([
+            # Failed task
+            Task(
+                title='Data Migration',
+                description='Migrate legacy database to new schema',
+                workspace=ws,
+                status=Task.STATUS_FAILED,
+                started_at=now - timedelta(hours=3),
+                completed_at=now - timedelta(hours=2.5)
+            ),
+            # Retry task
+            Task(
+                title='Data Migration (Retry)',
+                description='Re-attempt database migration with fixes',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+            # Pending tasks
+            Task(
+                title='Send Notifications',
+                description='Notify users of system changes',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+            Task(
+                title='Update Documentation',
+                description='Update API docs and user guides',
+                workspace=ws,
+                status=Task.STATUS_PENDING
+            ),
+        ])
+        add_dependencies([(task_retry, task_fail)])
         
         self.stdout.write(f"✓ Created Project Beta with failed/retry tasks: {task_fail.id}-{task_docs.id}")
 
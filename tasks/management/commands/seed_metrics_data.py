@@ -8,15 +8,41 @@ Usage: python manage.py seed_metrics_data
 """
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
+from collections import defaultdict
 from datetime import timedelta
+from functools import lru_cache
 import random
+from tasks.metrics import snapshot
 from tasks.models import Tenant, Task, TaskResult
 
+_ERRORS = (
+    'Connection timeout',
+    'API rate limit exceeded',
+    'Database lock timeout',
+    'Service unavailable',
+    'File not found',
+    'Permission denied',
+    'Out of memory',
+    'Invalid parameter',
+    'Network unreachable',
+    'SSL certificate error',
+)
+
+
+@lru_cache(maxsize=4096)
+def _format_duration(seconds):
+    """Format seconds to human readable duration"""
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f'{hours}h {minutes}m {secs}s'
+
 
 class Command(BaseCommand):
     help = 'Seed metrics-rich execution history and tasks'
 
+    @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('\n=== SEEDING METRICS DATA ===\n'))
 
@@ -34,11 +60,20 @@ class Command(BaseCommand):
         self.stdout.write('➕ Adding more tasks...\n')
         
         workspaces = Tenant.objects.all()
+        now = timezone.now()
+        Through = Task.dependencies.through
+        # Existing task ids for every workspace, read in one query
+        existing_by_ws = defaultdict(list)
+        for ws_id, task_id in Task.objects.values_list('workspace_id', 'id').iterator(chunk_size=2000):
+            existing_by_ws[ws_id].append(task_id)
         new_count = 0
         
         for ws in workspaces:
             # Add 5-8 more tasks per workspace
             num_tasks = random.randint(5, 8)
+            new_tasks = []
+            # Existing tasks: numbering starts after them and new tasks depend on them
+            existing_ids = existing_by_ws[ws.id]
             
             for i in range(num_tasks):
                 status = random.choices(
@@ -47,22 +82,25 @@ class Command(BaseCommand):
                     k=1
                 )[0]
                 
-                task = Task.objects.create(
-                    title=f'{ws.name} - Task {ws.tasks.count() + i + 1}',
+                new_tasks.append(Task(
+                    title=f'{ws.name} - Task {len(existing_ids) + i + 1}',
                     description=f'Additional task for {ws.name} workspace',
                     workspace=ws,
                     status=status,
-                    started_at=timezone.now() - timedelta(hours=random.randint(1, 72)) if status != Task.STATUS_PENDING else None,
-                    completed_at=timezone.now() - timedelta(hours=random.randint(0, 48)) if status in [Task.STATUS_DONE, Task.STATUS_FAILED] else None
-                )
-                
-                # Randomly link some tasks as dependencies
-                if ws.tasks.count() > 1 and random.random() > 0.6:
-                    existing_tasks = list(ws.tasks.exclude(id=task.id))[:3]
-                    if existing_tasks:
-                        task.dependencies.add(random.choice(existing_tasks))
-                
-                new_count += 1
+                    started_at=now - timedelta(hours=random.randint(1, 72)) if status != Task.STATUS_PENDING else None,
+                    completed_at=now - timedelta(hours=random.randint(0, 48)) if status in [Task.STATUS_DONE, Task.STATUS_FAILED] else None
+                ))
+            
+            Task.objects.bulk_create(new_tasks, batch_size=1000)
+            
+            # Randomly link some tasks as dependencies once they have ids
+            links = []
+            for task in new_tasks:
+                if existing_ids and random.random() > 0.6:
+                    links.append(Through(from_task_id=task.id, to_task_id=random.choice(existing_ids)))
+            Through.objects.bulk_create(links, batch_size=2000, ignore_conflicts=True)
+            
+            new_count += len(new_tasks)
         
         self.stdout.write(f'  ✓ Added {new_count} new tasks\n')
         return new_count
@@ -72,64 +110,58 @@ class Command(BaseCommand):
         self.stdout.write('⏱️  Adding extensive execution history...\n')
         
         # Get all tasks
-        all_tasks = Task.objects.all()
+        task_ids = list(Task.objects.values_list('id', flat=True))
+        now = timezone.now()
         created_count = 0
-        success_count = 0
-        failure_count = 0
-        total_duration = 0
-        
-        for task in all_tasks:
-            # Create 2-5 execution records per task
-            num_executions = random.randint(2, 5)
-            
+        buffer = []
+        
+        # Create 2-5 execution records per task
+        executions = random.choices(range(2, 6), k=len(task_ids))
+        total = sum(executions)
+        # 85% success rate; failures get an error message picked up front too
+        successes = random.choices((True, False), weights=(85, 15), k=total)
+        error_messages = [
+            '' if success else error
+            for success, error in zip(successes, random.choices(_ERRORS, k=total))
+        ]
+        success_count = sum(successes)
+        failure_count = total - success_count
+        # Start times over the last 30 days, at minute resolution
+        minutes_back = random.choices(range(24 * 60, 31 * 24 * 60), k=total)
+        # Duration: 10 seconds to 30 minutes
+        durations = random.choices(range(10, 1801), k=total)
+        total_duration = sum(durations)
+        
+        i = 0
+        for task_id, num_executions in zip(task_ids, executions):
             for attempt in range(num_executions):
-                # 85% success rate
-                success = random.random() > 0.15
-                
-                # Generate timestamps
-                days_back = random.randint(1, 30)
-                started = timezone.now() - timedelta(days=days_back, hours=random.randint(0, 23), minutes=random.randint(0, 59))
-                
-                # Duration: 10 seconds to 30 minutes
-                duration_seconds = random.randint(10, 1800)
-                completed = started + timedelta(seconds=duration_seconds)
+                success = successes[i]
                 
-                error_msg = ''
-                if not success:
-                    errors = [
-                        'Connection timeout',
-                        'API rate limit exceeded',
-                        'Database lock timeout',
-                        'Service unavailable',
-                        'File not found',
-                        'Permission denied',
-                        'Out of memory',
-                        'Invalid parameter',
-                        'Network unreachable',
-                        'SSL certificate error'
-                    ]
-                    error_msg = random.choice(errors)
-                    failure_count += 1
-                else:
-                    success_count += 1
+                started = now - timedelta(minutes=minutes_back[i])
+                completed = started + timedelta(seconds=durations[i])
                 
-                total_duration += duration_seconds
-                
-                result = TaskResult.objects.create(
-                    task=task,
+                buffer.append(TaskResult(
+                    task_id=task_id,
                     status='success' if success else 'failure',
                     output=f'Execution {"completed" if success else "failed"} - Attempt {attempt + 1}',
-                    error_message=error_msg,
+                    error_message=error_messages[i],
                     started_at=started,
                     completed_at=completed if success else None,
                     retry_count=attempt
-                )
+                ))
                 created_count += 1
+                i += 1
+                
+                if len(buffer) >= 5000:
+                    TaskResult.objects.bulk_create(buffer, batch_size=5000)
+                    buffer.clear()
+        
+        TaskResult.objects.bulk_create(buffer, batch_size=5000)
         
         self.stdout.write(f'  ✓ Created {created_count} execution records\n')
         self.stdout.write(f'    - {success_count} successful\n')
         self.stdout.write(f'    - {failure_count} failed\n')
-        self.stdout.write(f'    - Total duration: {self._format_duration(total_duration)}\n')
+        self.stdout.write(f'    - Total duration: {_format_duration(total_duration)}\n')
         
         return {
             'total': created_count,
@@ -138,92 +170,72 @@ class Command(BaseCommand):
             'total_duration': total_duration
         }
 
-    def _format_duration(self, seconds):
-        """Format seconds to human readable duration"""
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        secs = seconds % 60
-        return f'{hours}h {minutes}m {secs}s'
-
     def print_metrics_summary(self, new_tasks, execution_data):
         """Print comprehensive metrics summary"""
-        self.stdout.write(self.style.SUCCESS('\n📊 METRICS DASHBOARD\n'))
+        lines = []
+        out = lines.append
+        out(self.style.SUCCESS('\n📊 METRICS DASHBOARD'))
         
         # Calculate all metrics
-        total_tasks = Task.objects.count()
-        total_results = TaskResult.objects.count()
-        success_results = TaskResult.objects.filter(status='success').count()
-        failure_results = TaskResult.objects.filter(status='failure').count()
-        
-        # Total duration calculation
-        all_results = TaskResult.objects.all()
-        total_seconds = sum(
-            (r.completed_at - r.started_at).total_seconds() 
-            for r in all_results 
-            if r.completed_at and r.started_at
-        )
-        
-        # Task duration (sum of all task durations)
-        all_tasks = Task.objects.all()
-        task_duration_seconds = sum(
-            (t.completed_at - t.started_at).total_seconds()
-            for t in all_tasks
-            if t.completed_at and t.started_at
-        )
-        
-        total_all_seconds = total_seconds + task_duration_seconds
-        
-        self.stdout.write(f'\n{"─" * 60}')
-        self.stdout.write('TOTAL TASKS')
-        self.stdout.write(f'{"─" * 60}')
-        self.stdout.write(f'{total_tasks:>15} tasks')
-        self.stdout.write(f'  ├─ Pending:  {Task.objects.filter(status=Task.STATUS_PENDING).count()}')
-        self.stdout.write(f'  ├─ Running:  {Task.objects.filter(status=Task.STATUS_RUNNING).count()}')
-        self.stdout.write(f'  ├─ Done:     {Task.objects.filter(status=Task.STATUS_DONE).count()}')
-        self.stdout.write(f'  └─ Failed:   {Task.objects.filter(status=Task.STATUS_FAILED).count()}')
-        
-        self.stdout.write(f'\n{"─" * 60}')
-        self.stdout.write('SUCCESSFUL EXECUTIONS')
-        self.stdout.write(f'{"─" * 60}')
-        self.stdout.write(f'{success_results:>15} executions')
+        metrics = snapshot()
+        task_stats = metrics.tasks_by_status
+        total_tasks = metrics.total_tasks
+        total_results = metrics.total_results
+        success_results = metrics.success_results
+        failure_results = metrics.failure_results
+        total_seconds = metrics.execution_seconds
+        task_duration_seconds = metrics.task_seconds
+        total_all_seconds = metrics.total_seconds
+        
+        out(f'\n{"─" * 60}')
+        out('TOTAL TASKS')
+        out(f'{"─" * 60}')
+        out(f'{total_tasks:>15} tasks')
+        out(f'  ├─ Pending:  {task_stats["pending"]}')
+        out(f'  ├─ Running:  {task_stats["running"]}')
+        out(f'  ├─ Done:     {task_stats["done"]}')
+        out(f'  └─ Failed:   {task_stats["failed"]}')
+        
+        out(f'\n{"─" * 60}')
+        out('SUCCESSFUL EXECUTIONS')
+        out(f'{"─" * 60}')
+        out(f'{success_results:>15} executions')
         if total_results > 0:
             success_rate = (success_results / total_results) * 100
-            self.stdout.write(f'  └─ Success Rate: {success_rate:.1f}%')
+            out(f'  └─ Success Rate: {success_rate:.1f}%')
         
-        self.stdout.write(f'\n{"─" * 60}')
-        self.stdout.write('FAILED EXECUTIONS')
-        self.stdout.write(f'{"─" * 60}')
-        self.stdout.write(f'{failure_results:>15} executions')
+        out(f'\n{"─" * 60}')
+        out('FAILED EXECUTIONS')
+        out(f'{"─" * 60}')
+        out(f'{failure_results:>15} executions')
         if total_results > 0:
             failure_rate = (failure_results / total_results) * 100
-            self.stdout.write(f'  └─ Failure Rate: {failure_rate:.1f}%')
-        
-        self.stdout.write(f'\n{"─" * 60}')
-        self.stdout.write('TOTAL DURATION')
-        self.stdout.write(f'{"─" * 60}')
-        self.stdout.write(f'{self._format_duration(int(total_all_seconds)):>15}')
-        self.stdout.write(f'  ├─ Execution Time: {self._format_duration(int(total_seconds))}')
-        self.stdout.write(f'  ├─ Task Time:      {self._format_duration(int(task_duration_seconds))}')
-        self.stdout.write(f'  └─ Average Task:   {self._format_duration(int(task_duration_seconds / max(total_tasks, 1)))}')
-        
-        self.stdout.write(f'\n{"─" * 60}')
-        self.stdout.write('WORKSPACES OVERVIEW')
-        self.stdout.write(f'{"─" * 60}')
-        
-        for ws in Tenant.objects.all().order_by('name'):
-            task_count = ws.tasks.count()
-            result_count = TaskResult.objects.filter(task__workspace=ws).count()
-            success_count = TaskResult.objects.filter(task__workspace=ws, status='success').count()
-            
-            self.stdout.write(f'\n{ws.name}')
-            self.stdout.write(f'  Tasks: {task_count} | Executions: {result_count} | Successful: {success_count}')
-        
-        self.stdout.write(f'\n{"─" * 60}\n')
-        
-        self.stdout.write(self.style.SUCCESS('✅ Metrics data seeded successfully!'))
-        self.stdout.write('\nYour dashboard now includes:')
-        self.stdout.write(f'  ✓ {total_tasks} total tasks')
-        self.stdout.write(f'  ✓ {total_results} execution records')
-        self.stdout.write(f'  ✓ {success_results} successful executions')
-        self.stdout.write(f'  ✓ {failure_results} failed executions')
-        self.stdout.write(f'  ✓ {self._format_duration(int(total_all_seconds))} total tracked time')
+            out(f'  └─ Failure Rate: {failure_rate:.1f}%')
+        
+        out(f'\n{"─" * 60}')
+        out('TOTAL DURATION')
+        out(f'{"─" * 60}')
+        out(f'{_format_duration(int(total_all_seconds)):>15}')
+        out(f'  ├─ Execution Time: {_format_duration(int(total_seconds))}')
+        out(f'  ├─ Task Time:      {_format_duration(int(task_duration_seconds))}')
+        out(f'  └─ Average Task:   {_format_duration(int(task_duration_seconds / max(total_tasks, 1)))}')
+        
+        out(f'\n{"─" * 60}')
+        out('WORKSPACES OVERVIEW')
+        out(f'{"─" * 60}')
+        
+        for name, task_count, result_count, success_count in metrics.workspaces:
+            out(f'\n{name}')
+            out(f'  Tasks: {task_count} | Executions: {result_count} | Successful: {success_count}')
+        
+        out(f'\n{"─" * 60}')
+        
+        out(self.style.SUCCESS('✅ Metrics data seeded successfully!'))
+        out('\nYour dashboard now includes:')
+        out(f'  ✓ {total_tasks} total tasks')
+        out(f'  ✓ {total_results} execution records')
+        out(f'  ✓ {success_results} successful executions')
+        out(f'  ✓ {failure_results} failed executions')
+        out(f'  ✓ {_format_duration(int(total_all_seconds))} total tracked time')
+
+        self.stdout.write('\n'.join(lines))
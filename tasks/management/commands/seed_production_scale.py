@@ -5,15 +5,59 @@ Usage: python manage.py seed_production_scale
 """
 
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 from django.utils import timezone
+from collections import defaultdict
 from datetime import timedelta
+from functools import lru_cache
 import random
+from tasks.metrics import snapshot
 from tasks.models import Tenant, Task, TaskResult
+from tasks.seeding import get_or_create_tenants
+
+_ERRORS = (
+    'Timeout: Operation exceeded 30s limit',
+    'API rate limit: 429 Too Many Requests',
+    'Database lock: Unable to acquire lock',
+    'Service unavailable: Temporary service outage',
+    'File not found: S3 bucket error',
+    'Permission denied: IAM policy violation',
+    'Memory error: Insufficient heap space',
+    'Network error: Connection reset',
+    'Validation error: Invalid input format',
+    'External API error: Third-party service down',
+)
+
+_RESULT_COLUMNS = ('task_id', 'status', 'output', 'error_message', 'started_at', 'completed_at', 'retry_count')
+
+
+@lru_cache(maxsize=4096)
+def _format_duration(seconds):
+    """Format seconds to human readable duration"""
+    if seconds < 0:
+        return '—'
+    
+    days, rem = divmod(seconds, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    
+    parts = []
+    if days > 0:
+        parts.append(f'{days}d')
+    if hours > 0:
+        parts.append(f'{hours}h')
+    if minutes > 0:
+        parts.append(f'{minutes}m')
+    if secs > 0 or not parts:
+        parts.append(f'{secs}s')
+    
+    return ' '.join(parts[:3])
 
 
 class Command(BaseCommand):
     help = 'Seed production-scale data for realistic project demonstration'
 
+    @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('\n' + '='*70))
         self.stdout.write(self.style.SUCCESS('🚀 SEEDING PRODUCTION-SCALE DATA'))
@@ -62,28 +106,34 @@ class Command(BaseCommand):
             }
         ]
         
+        tenants, created_keys = get_or_create_tenants(
+            [(ws_data['key'], ws_data['name']) for ws_data in enterprise_workspaces]
+        )
+        
+        now = timezone.now()
+        new_tasks = []
         for ws_data in enterprise_workspaces:
-            ws, created = Tenant.objects.get_or_create(
-                key=ws_data['key'],
-                defaults={'name': ws_data['name']}
+            if ws_data['key'] not in created_keys:
+                continue
+            ws = tenants[ws_data['key']]
+            self.stdout.write(f'  ✓ {ws_data["name"]}')
+            # Add 8-12 tasks per new workspace
+            new_tasks.extend(
+                Task(
+                    title=f'{ws_data["name"]} - Task {i+1}',
+                    description=ws_data['description'],
+                    workspace=ws,
+                    status=random.choices(
+                        [Task.STATUS_PENDING, Task.STATUS_DONE, Task.STATUS_RUNNING, Task.STATUS_FAILED],
+                        weights=[45, 40, 10, 5],
+                        k=1
+                    )[0],
+                    started_at=now - timedelta(days=random.randint(1, 30)) if i % 2 == 0 else None,
+                    completed_at=now - timedelta(days=random.randint(0, 25)) if i % 3 == 0 else None
+                )
+                for i in range(random.randint(8, 12))
             )
-            
-            if created:
-                self.stdout.write(f'  ✓ {ws_data["name"]}')
-                # Add 8-12 tasks per new workspace
-                for i in range(random.randint(8, 12)):
-                    Task.objects.create(
-                        title=f'{ws_data["name"]} - Task {i+1}',
-                        description=ws_data['description'],
-                        workspace=ws,
-                        status=random.choices(
-                            [Task.STATUS_PENDING, Task.STATUS_DONE, Task.STATUS_RUNNING, Task.STATUS_FAILED],
-                            weights=[45, 40, 10, 5],
-                            k=1
-                        )[0],
-                        started_at=timezone.now() - timedelta(days=random.randint(1, 30)) if i % 2 == 0 else None,
-                        completed_at=timezone.now() - timedelta(days=random.randint(0, 25)) if i % 3 == 0 else None
-                    )
+        Task.objects.bulk_create(new_tasks, batch_size=1000)
         
         self.stdout.write()
 
@@ -92,11 +142,19 @@ class Command(BaseCommand):
         self.stdout.write('📈 Expanding all workspaces with additional tasks...\n')
         
         workspaces = Tenant.objects.all()
+        now = timezone.now()
+        Through = Task.dependencies.through
+        # Existing task ids for every workspace, read in one query
+        existing_by_ws = defaultdict(list)
+        for ws_id, task_id in Task.objects.values_list('workspace_id', 'id').iterator(chunk_size=2000):
+            existing_by_ws[ws_id].append(task_id)
         total_added = 0
         
         for ws in workspaces:
             # Add 25-35 more tasks per workspace
             num_tasks = random.randint(25, 35)
+            new_tasks = []
+            existing_ids = existing_by_ws[ws.id]
             
             for i in range(num_tasks):
                 status = random.choices(
@@ -105,22 +163,25 @@ class Command(BaseCommand):
                     k=1
                 )[0]
                 
-                task = Task.objects.create(
+                new_tasks.append(Task(
                     title=f'{ws.name} - Extended Task {i+1}',
                     description=f'Production task for {ws.name} pipeline',
                     workspace=ws,
                     status=status,
-                    started_at=timezone.now() - timedelta(days=random.randint(1, 60)) if status != Task.STATUS_PENDING else None,
-                    completed_at=timezone.now() - timedelta(days=random.randint(0, 55)) if status in [Task.STATUS_DONE, Task.STATUS_FAILED] else None
-                )
-                
-                # Link some tasks as dependencies
-                if ws.tasks.count() > 2 and random.random() > 0.55:
-                    existing = list(ws.tasks.exclude(id=task.id))[:5]
-                    if existing:
-                        task.dependencies.add(random.choice(existing))
-                
-                total_added += 1
+                    started_at=now - timedelta(days=random.randint(1, 60)) if status != Task.STATUS_PENDING else None,
+                    completed_at=now - timedelta(days=random.randint(0, 55)) if status in [Task.STATUS_DONE, Task.STATUS_FAILED] else None
+                ))
+            
+            Task.objects.bulk_create(new_tasks, batch_size=1000)
+            
+            # Link some tasks as dependencies once they have ids
+            links = []
+            for task in new_tasks:
+                if len(existing_ids) > 1 and random.random() > 0.55:
+                    links.append(Through(from_task_id=task.id, to_task_id=random.choice(existing_ids)))
+            Through.objects.bulk_create(links, batch_size=2000, ignore_conflicts=True)
+            
+            total_added += len(new_tasks)
         
         self.stdout.write(f'  ✓ Added {total_added} expanded tasks\n')
 
@@ -128,183 +189,163 @@ class Command(BaseCommand):
         """Add 1500+ execution records"""
         self.stdout.write('⏱️  Seeding massive execution history...\n')
         
-        all_tasks = Task.objects.all()
-        total_created = 0
-        success_count = 0
-        failure_count = 0
+        task_ids = list(Task.objects.values_list('id', flat=True))
+        now = timezone.now()
+        adapt = connection.ops.adapt_datetimefield_value
+        buffer = []
         
-        # Create 5-10 execution records per task (realistic retry patterns)
-        for task in all_tasks:
-            num_executions = random.randint(5, 10)
-            
+        # Draw every random value up front, one batch per field.
+        # 5-10 execution records per task (realistic retry patterns)
+        executions = random.choices(range(5, 11), k=len(task_ids))
+        total_created = sum(executions)
+        # Realistic success distribution: 80% success, 20% failure
+        successes = random.choices((True, False), weights=(80, 20), k=total_created)
+        # Start times over the last 90 days, at minute resolution
+        minutes_back = random.choices(range(24 * 60, 91 * 24 * 60), k=total_created)
+        # Execution duration: 5 seconds to 1 hour
+        durations = random.choices(range(5, 3601), k=total_created)
+        error_messages = [
+            '' if success else error
+            for success, error in zip(successes, random.choices(_ERRORS, k=total_created))
+        ]
+        success_count = sum(successes)
+        failure_count = total_created - success_count
+        
+        i = 0
+        for task_id, num_executions in zip(task_ids, executions):
             for attempt in range(num_executions):
-                # Realistic success distribution: 80% success, 20% failure
-                success = random.random() > 0.20
-                
-                # Generate realistic timestamps (last 90 days)
-                days_back = random.randint(1, 90)
-                hours_back = random.randint(0, 23)
-                started = timezone.now() - timedelta(days=days_back, hours=hours_back, minutes=random.randint(0, 59))
-                
-                # Execution duration: 5 seconds to 1 hour
-                duration_seconds = random.randint(5, 3600)
-                completed = started + timedelta(seconds=duration_seconds)
+                success = successes[i]
+                started = now - timedelta(minutes=minutes_back[i])
                 
-                error_msg = ''
-                if not success:
-                    errors = [
-                        'Timeout: Operation exceeded 30s limit',
-                        'API rate limit: 429 Too Many Requests',
-                        'Database lock: Unable to acquire lock',
-                        'Service unavailable: Temporary service outage',
-                        'File not found: S3 bucket error',
-                        'Permission denied: IAM policy violation',
-                        'Memory error: Insufficient heap space',
-                        'Network error: Connection reset',
-                        'Validation error: Invalid input format',
-                        'External API error: Third-party service down'
-                    ]
-                    error_msg = random.choice(errors)
-                    failure_count += 1
-                else:
-                    success_count += 1
+                buffer.append((
+                    task_id,
+                    'success' if success else 'failure',
+                    f'Attempt {attempt + 1}: {"SUCCESS" if success else "FAILED"}',
+                    error_messages[i],
+                    adapt(started),
+                    adapt(started + timedelta(seconds=durations[i])) if success else None,
+                    attempt,
+                ))
+                i += 1
                 
-                TaskResult.objects.create(
-                    task=task,
-                    status='success' if success else 'failure',
-                    output=f'Attempt {attempt + 1}: {"SUCCESS" if success else "FAILED"}',
-                    error_message=error_msg,
-                    started_at=started,
-                    completed_at=completed if success else None,
-                    retry_count=attempt
-                )
-                total_created += 1
+                if len(buffer) >= 5000:
+                    self._insert_results(buffer)
+                    buffer.clear()
+        
+        if buffer:
+            self._insert_results(buffer)
         
         self.stdout.write(f'  ✓ Created {total_created} execution records')
         self.stdout.write(f'    - {success_count} successful ({success_count/total_created*100:.1f}%)')
         self.stdout.write(f'    - {failure_count} failed ({failure_count/total_created*100:.1f}%)\n')
 
+    def _insert_results(self, rows):
+        """Insert TaskResult rows given as tuples in _RESULT_COLUMNS order.
+
+        Writes multi-row INSERTs straight through the cursor, skipping model
+        instantiation; started_at is stored as given rather than replaced by
+        auto_now_add.
+        """
+        if not rows:
+            return
+        table = connection.ops.quote_name(TaskResult._meta.db_table)
+        placeholders = '(' + ', '.join(['%s'] * len(_RESULT_COLUMNS)) + ')'
+        # PostgreSQL returns len(rows) here, which is 0 for an empty list
+        batch_size = max(connection.ops.bulk_batch_size(_RESULT_COLUMNS, rows), 1)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(
+                    f'INSERT INTO {table} ({", ".join(_RESULT_COLUMNS)}) VALUES '
+                    + ', '.join([placeholders] * len(batch)),
+                    [value for row in batch for value in row],
+                )
+
     def print_comprehensive_summary(self):
         """Print comprehensive production statistics"""
-        self.stdout.write(self.style.SUCCESS('='*70))
-        self.stdout.write(self.style.SUCCESS('📊 PRODUCTION-SCALE PROJECT STATISTICS'))
-        self.stdout.write(self.style.SUCCESS('='*70 + '\n'))
-        
-        # Overall stats
-        total_workspaces = Tenant.objects.count()
-        total_tasks = Task.objects.count()
-        total_results = TaskResult.objects.count()
+        lines = []
+        out = lines.append
+        out(self.style.SUCCESS('='*70))
+        out(self.style.SUCCESS('📊 PRODUCTION-SCALE PROJECT STATISTICS'))
+        out(self.style.SUCCESS('='*70))
         
-        success_results = TaskResult.objects.filter(status='success').count()
-        failure_results = TaskResult.objects.filter(status='failure').count()
+        # Overall stats, with workspaces already sorted for the breakdown below
+        metrics = snapshot(workspace_order='-task_count')
+        task_stats = metrics.tasks_by_status
+        workspaces = metrics.workspaces
+        total_workspaces = len(workspaces)
+        total_tasks = metrics.total_tasks
+        total_results = metrics.total_results
         
-        # Calculate comprehensive metrics
-        all_results = TaskResult.objects.all()
-        total_execution_seconds = sum(
-            (r.completed_at - r.started_at).total_seconds() 
-            for r in all_results 
-            if r.completed_at and r.started_at
-        )
-        
-        all_tasks = Task.objects.all()
-        task_duration_seconds = sum(
-            (t.completed_at - t.started_at).total_seconds()
-            for t in all_tasks
-            if t.completed_at and t.started_at
-        )
+        success_results = metrics.success_results
+        failure_results = metrics.failure_results
         
-        total_duration = total_execution_seconds + task_duration_seconds
+        total_execution_seconds = metrics.execution_seconds
+        task_duration_seconds = metrics.task_seconds
+        total_duration = metrics.total_seconds
         
         # Print comprehensive metrics
-        self.stdout.write(self.style.SUCCESS('📈 SCALE METRICS'))
-        self.stdout.write(f'  Workspaces ........... {total_workspaces}')
-        self.stdout.write(f'  Total Tasks ......... {total_tasks}')
-        self.stdout.write(f'  Execution Records ... {total_results}')
-        self.stdout.write()
+        out(self.style.SUCCESS('📈 SCALE METRICS'))
+        out(f'  Workspaces ........... {total_workspaces}')
+        out(f'  Total Tasks ......... {total_tasks}')
+        out(f'  Execution Records ... {total_results}')
+        out('')
         
         # Task distribution
-        pending = Task.objects.filter(status=Task.STATUS_PENDING).count()
-        running = Task.objects.filter(status=Task.STATUS_RUNNING).count()
-        done = Task.objects.filter(status=Task.STATUS_DONE).count()
-        failed = Task.objects.filter(status=Task.STATUS_FAILED).count()
+        pending = task_stats['pending']
+        running = task_stats['running']
+        done = task_stats['done']
+        failed = task_stats['failed']
         
-        self.stdout.write(self.style.SUCCESS('📊 TASK STATUS DISTRIBUTION'))
-        self.stdout.write(f'  Pending ............ {pending:4} ({pending/total_tasks*100:5.1f}%)')
-        self.stdout.write(f'  Running ............ {running:4} ({running/total_tasks*100:5.1f}%)')
-        self.stdout.write(f'  Done ............... {done:4} ({done/total_tasks*100:5.1f}%)')
-        self.stdout.write(f'  Failed ............ {failed:4} ({failed/total_tasks*100:5.1f}%)')
-        self.stdout.write()
+        out(self.style.SUCCESS('📊 TASK STATUS DISTRIBUTION'))
+        out(f'  Pending ............ {pending:4} ({pending/total_tasks*100:5.1f}%)')
+        out(f'  Running ............ {running:4} ({running/total_tasks*100:5.1f}%)')
+        out(f'  Done ............... {done:4} ({done/total_tasks*100:5.1f}%)')
+        out(f'  Failed ............ {failed:4} ({failed/total_tasks*100:5.1f}%)')
+        out('')
         
         # Execution results
         success_rate = (success_results / total_results * 100) if total_results > 0 else 0
         
-        self.stdout.write(self.style.SUCCESS('✅ EXECUTION RESULTS'))
-        self.stdout.write(f'  Successful ......... {success_results:4} ({success_rate:5.1f}%)')
-        self.stdout.write(f'  Failed ............. {failure_results:4} ({100-success_rate:5.1f}%)')
-        self.stdout.write(f'  Total Executions ... {total_results}')
-        self.stdout.write()
+        out(self.style.SUCCESS('✅ EXECUTION RESULTS'))
+        out(f'  Successful ......... {success_results:4} ({success_rate:5.1f}%)')
+        out(f'  Failed ............. {failure_results:4} ({100-success_rate:5.1f}%)')
+        out(f'  Total Executions ... {total_results}')
+        out('')
         
         # Duration metrics
-        self.stdout.write(self.style.SUCCESS('⏱️  PERFORMANCE METRICS'))
-        self.stdout.write(f'  Total Duration ..... {self._format_duration(int(total_duration))}')
-        self.stdout.write(f'  Execution Time ..... {self._format_duration(int(total_execution_seconds))}')
-        self.stdout.write(f'  Task Time .......... {self._format_duration(int(task_duration_seconds))}')
-        self.stdout.write(f'  Avg Task Time ...... {self._format_duration(int(task_duration_seconds / max(total_tasks, 1)))}')
-        self.stdout.write()
+        out(self.style.SUCCESS('⏱️  PERFORMANCE METRICS'))
+        out(f'  Total Duration ..... {_format_duration(int(total_duration))}')
+        out(f'  Execution Time ..... {_format_duration(int(total_execution_seconds))}')
+        out(f'  Task Time .......... {_format_duration(int(task_duration_seconds))}')
+        out(f'  Avg Task Time ...... {_format_duration(int(task_duration_seconds / max(total_tasks, 1)))}')
+        out('')
         
         # Workspace breakdown
-        self.stdout.write(self.style.SUCCESS('🏢 WORKSPACE BREAKDOWN'))
-        workspaces_list = sorted(
-            Tenant.objects.all(),
-            key=lambda x: x.tasks.count(),
-            reverse=True
-        )
-        for ws in workspaces_list:
-            tasks_count = ws.tasks.count()
-            results_count = TaskResult.objects.filter(task__workspace=ws).count()
-            success_in_ws = TaskResult.objects.filter(task__workspace=ws, status='success').count()
-            ws_success_rate = (success_in_ws / results_count * 100) if results_count > 0 else 0
+        out(self.style.SUCCESS('🏢 WORKSPACE BREAKDOWN'))
+        for name, task_count, result_count, success_in_ws in workspaces:
+            ws_success_rate = (success_in_ws / result_count * 100) if result_count > 0 else 0
             
-            self.stdout.write(f'  {ws.name}')
-            self.stdout.write(f'    Tasks: {tasks_count:3} | Executions: {results_count:4} | Success Rate: {ws_success_rate:5.1f}%')
+            out(f'  {name}')
+            out(f'    Tasks: {task_count:3} | Executions: {result_count:4} | Success Rate: {ws_success_rate:5.1f}%')
         
-        self.stdout.write()
-        self.stdout.write(self.style.SUCCESS('='*70))
-        self.stdout.write(self.style.SUCCESS('✅ PRODUCTION-SCALE DATA SEEDING COMPLETE'))
-        self.stdout.write(self.style.SUCCESS('='*70 + '\n'))
+        out('')
+        out(self.style.SUCCESS('='*70))
+        out(self.style.SUCCESS('✅ PRODUCTION-SCALE DATA SEEDING COMPLETE'))
+        out(self.style.SUCCESS('='*70))
         
-        self.stdout.write('🎯 Your FlowState Dashboard Now Includes:')
-        self.stdout.write(f'   • {total_workspaces} production workspaces')
-        self.stdout.write(f'   • {total_tasks} real-world tasks')
-        self.stdout.write(f'   • {total_results} execution records')
-        self.stdout.write(f'   • {success_rate:.1f}% success rate')
-        self.stdout.write(f'   • {self._format_duration(int(total_duration))} total tracked time\n')
+        out('🎯 Your FlowState Dashboard Now Includes:')
+        out(f'   • {total_workspaces} production workspaces')
+        out(f'   • {total_tasks} real-world tasks')
+        out(f'   • {total_results} execution records')
+        out(f'   • {success_rate:.1f}% success rate')
+        out(f'   • {_format_duration(int(total_duration))} total tracked time')
         
-        self.stdout.write('🚀 Ready for:')
-        self.stdout.write('   • Production-level testing')
-        self.stdout.write('   • Performance analysis and optimization')
-        self.stdout.write('   • Real-world workflow demonstrations')
-        self.stdout.write('   • Analytics and reporting')
-        self.stdout.write('   • Scaling and load testing\n')
+        out('🚀 Ready for:')
+        out('   • Production-level testing')
+        out('   • Performance analysis and optimization')
+        out('   • Real-world workflow demonstrations')
+        out('   • Analytics and reporting')
+        out('   • Scaling and load testing')
 
-    def _format_duration(self, seconds):
-        """Format seconds to human readable duration"""
-        if seconds < 0:
-            return '—'
-        
-        days = seconds // 86400
-        hours = (seconds % 86400) // 3600
-        minutes = (seconds % 3600) // 60
-        secs = seconds % 60
-        
-        parts = []
-        if days > 0:
-            parts.append(f'{days}d')
-        if hours > 0:
-            parts.append(f'{hours}h')
-        if minutes > 0:
-            parts.append(f'{minutes}m')
-        if secs > 0 or not parts:
-            parts.append(f'{secs}s')
-        
-        return ' '.join(parts[:3])
+        self.stdout.write('\n'.join(lines))
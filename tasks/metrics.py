@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+
+from .models import Tenant, Task, TaskResult
+
+# completed_at - started_at; NULL when either timestamp is missing
+ELAPSED = ExpressionWrapper(F('completed_at') - F('started_at'), output_field=DurationField())
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """Task, execution and per-workspace totals across all workspaces."""
+    tasks_by_status: dict
+    total_tasks: int
+    task_seconds: float
+    total_results: int
+    success_results: int
+    failure_results: int
+    execution_seconds: float
+    # (name, task_count, result_count, success_count) per workspace
+    workspaces: list
+
+    @property
+    def total_seconds(self):
+        return self.execution_seconds + self.task_seconds
+
+
+def snapshot(workspace_order='name'):
+    """Read a MetricsSnapshot in three queries.
+
+    Take one snapshot per report and render from it; it is not refreshed.
+    `workspace_order` is passed to order_by() for the workspace rows, which
+    also accepts the annotated counts (e.g. '-task_count').
+    """
+    task_stats = Task.objects.aggregate(
+        pending=Count('id', filter=Q(status=Task.STATUS_PENDING)),
+        running=Count('id', filter=Q(status=Task.STATUS_RUNNING)),
+        done=Count('id', filter=Q(status=Task.STATUS_DONE)),
+        failed=Count('id', filter=Q(status=Task.STATUS_FAILED)),
+        total=Count('id'),
+        duration=Sum(ELAPSED),
+    )
+    result_stats = TaskResult.objects.aggregate(
+        total=Count('id'),
+        success=Count('id', filter=Q(status=TaskResult.STATUS_SUCCESS)),
+        failure=Count('id', filter=Q(status=TaskResult.STATUS_FAILURE)),
+        duration=Sum(ELAPSED),
+    )
+    # One GROUP BY over tenant -> task -> result; each result row appears
+    # once in the join, so only the task count needs DISTINCT
+    workspaces = list(
+        Tenant.objects.annotate(
+            task_count=Count('tasks', distinct=True),
+            result_count=Count('tasks__results'),
+            success_count=Count('tasks__results', filter=Q(tasks__results__status=TaskResult.STATUS_SUCCESS)),
+        )
+        .values_list('name', 'task_count', 'result_count', 'success_count')
+        .order_by(workspace_order)
+    )
+
+    task_duration = task_stats.pop('duration')
+    result_duration = result_stats['duration']
+    return MetricsSnapshot(
+        total_tasks=task_stats.pop('total'),
+        tasks_by_status=task_stats,
+        task_seconds=task_duration.total_seconds() if task_duration else 0,
+        total_results=result_stats['total'],
+        success_results=result_stats['success'],
+        failure_results=result_stats['failure'],
+        execution_seconds=result_duration.total_seconds() if result_duration else 0,
+        workspaces=workspaces,
+    )
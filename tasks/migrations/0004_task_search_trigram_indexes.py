@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # GIN trigram indexes for '%term%' search. PostgreSQL-only; other
+    # backends keep scanning. Django's icontains does not match these bare
+    # column indexes; 0008 replaces them with UPPER() expression indexes.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS tasks_task_title_trgm '
+        'ON tasks_task USING gin (title gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS tasks_task_description_trgm '
+        'ON tasks_task USING gin (description gin_trgm_ops)'
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS tasks_task_description_trgm')
+    schema_editor.execute('DROP INDEX IF EXISTS tasks_task_title_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_index_admin_sort_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:11
+
+from django.db import migrations, models
+
+
+def backfill_duration(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    finished = (
+        Task.objects.filter(started_at__isnull=False, completed_at__isnull=False)
+        .only('started_at', 'completed_at')
+    )
+    batch = []
+    for task in finished.iterator(chunk_size=2000):
+        task.duration = (task.completed_at - task.started_at).total_seconds()
+        batch.append(task)
+        if len(batch) >= 2000:
+            Task.objects.bulk_update(batch, ['duration'])
+            batch = []
+    Task.objects.bulk_update(batch, ['duration'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='duration',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_duration, migrations.RunPython.noop),
+    ]
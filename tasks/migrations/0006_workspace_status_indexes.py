@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_duration'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['workspace', 'status'], name='task_workspace_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskresult',
+            index=models.Index(fields=['task', 'status'], name='taskresult_task_status_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_workspace_status_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='taskresult',
+            options={},
+        ),
+    ]
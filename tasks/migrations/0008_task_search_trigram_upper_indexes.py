@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+def create_upper_trigram_indexes(apps, schema_editor):
+    # On PostgreSQL, icontains (admin search_fields, DRF SearchFilter and the
+    # task list's ?search=) compiles to UPPER("col"::text) LIKE UPPER(%s), so
+    # a trigram index on the bare column is never used. Index that expression
+    # instead and drop the unusable indexes from 0004.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS tasks_task_title_trgm')
+    schema_editor.execute('DROP INDEX IF EXISTS tasks_task_description_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS tasks_task_title_upper_trgm '
+        'ON tasks_task USING gin ((UPPER(title::text)) gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS tasks_task_description_upper_trgm '
+        'ON tasks_task USING gin ((UPPER(description::text)) gin_trgm_ops)'
+    )
+
+
+def drop_upper_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS tasks_task_description_upper_trgm')
+    schema_editor.execute('DROP INDEX IF EXISTS tasks_task_title_upper_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS tasks_task_title_trgm '
+        'ON tasks_task USING gin (title gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS tasks_task_description_trgm '
+        'ON tasks_task USING gin (description gin_trgm_ops)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_taskresult_no_default_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_upper_trigram_indexes, drop_upper_trigram_indexes),
+    ]
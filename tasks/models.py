@@ -30,10 +30,18 @@ class Task(models.Model):
 	workspace = models.ForeignKey(Tenant, related_name='tasks', on_delete=models.CASCADE)
 	dependencies = models.ManyToManyField('self', symmetrical=False, related_name='dependents', blank=True)
 	status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
-	created_at = models.DateTimeField(auto_now_add=True)
+	created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 	updated_at = models.DateTimeField(auto_now=True)
 	started_at = models.DateTimeField(null=True, blank=True)
 	completed_at = models.DateTimeField(null=True, blank=True)
+	# Seconds from started_at to completed_at, stored when the task finishes
+	duration = models.FloatField(null=True, blank=True, editable=False)
+
+	class Meta:
+		indexes = [
+			# Workspace listings and metrics filter on workspace, then status
+			models.Index(fields=['workspace', 'status'], name='task_workspace_status_idx'),
+		]
 
 	def __str__(self):
 		return f"{self.title} ({self.pk})"
@@ -43,6 +51,8 @@ class Task(models.Model):
 
 	def duration_seconds(self):
 		"""Return execution duration in seconds."""
+		if self.duration is not None:
+			return self.duration
 		if self.started_at and self.completed_at:
 			return (self.completed_at - self.started_at).total_seconds()
 		return None
@@ -65,11 +75,15 @@ class TaskResult(models.Model):
 	output = models.TextField(blank=True)
 	error_message = models.TextField(blank=True)
 	retry_count = models.IntegerField(default=0)
-	started_at = models.DateTimeField(auto_now_add=True)
+	started_at = models.DateTimeField(auto_now_add=True, db_index=True)
 	completed_at = models.DateTimeField(null=True, blank=True)
 
 	class Meta:
-		ordering = ['-started_at']
+		# No default ordering: callers that show results newest-first ask for
+		# it, and counts, aggregates and bulk reads skip the sort
+		indexes = [
+			models.Index(fields=['task', 'status'], name='taskresult_task_status_idx'),
+		]
 
 	def __str__(self):
 		return f"Task {self.task.id} - {self.status} (Attempt {self.retry_count + 1})"
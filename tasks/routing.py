@@ -1,6 +1,6 @@
-from django.urls import re_path
+from django.urls import path
 from . import consumers
 
 websocket_urlpatterns = [
-    re_path(r'ws/workspace/(?P<workspace>[^/]+)/$', consumers.WorkspaceConsumer.as_asgi()),
+    path('ws/workspace/<str:workspace>/', consumers.WorkspaceConsumer.as_asgi()),
 ]
@@ -0,0 +1,56 @@
+"""Bulk helpers shared by the seed_* management commands."""
+
+from django.db.models import Q
+
+from .models import Task, TaskResult, Tenant
+
+
+def get_or_create_tenants(pairs):
+    """Return ({key: Tenant}, created_keys) for (key, name) pairs.
+
+    Existing tenants are read in one query and the missing ones inserted in
+    one more. The insert ignores conflicts, so a tenant created concurrently
+    is picked up instead of failing the seed; that also leaves the new pks
+    unset, hence the final read.
+    """
+    keys = [key for key, _ in pairs]
+    tenants = Tenant.objects.in_bulk(keys, field_name='key')
+    missing = [Tenant(key=key, name=name) for key, name in pairs if key not in tenants]
+    if missing:
+        Tenant.objects.bulk_create(missing, ignore_conflicts=True)
+        tenants = Tenant.objects.in_bulk(keys, field_name='key')
+    return tenants, {tenant.key for tenant in missing}
+
+
+def add_dependencies(edges):
+    """Insert (task, dependency) pairs into the M2M table in one query per 1000.
+
+    Pairs that already exist are skipped.
+    """
+    Through = Task.dependencies.through
+    Through.objects.bulk_create(
+        [Through(from_task_id=task.id, to_task_id=dep.id) for task, dep in edges],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def clear_tasks(tasks):
+    """Delete a Task queryset with one DELETE per table.
+
+    QuerySet.delete() first SELECTs the tasks and walks the deletion collector
+    to cascade to results and dependency rows. Here the dependency rows on
+    either side of the tasks and their results are deleted directly, then the
+    tasks themselves, using the private QuerySet._raw_delete(). That bypasses
+    the collector entirely: no pre_delete/post_delete or m2m_changed signals
+    are sent and only the cascades written out here happen, so this is only
+    for seeding, where nothing listens for those signals. Re-check it when a
+    model gains a relation to Task, or if _raw_delete() changes upstream.
+    """
+    task_ids = tasks.values('id')
+    Through = Task.dependencies.through
+    Through.objects.filter(
+        Q(from_task_id__in=task_ids) | Q(to_task_id__in=task_ids)
+    )._raw_delete(Through.objects.db)
+    TaskResult.objects.filter(task_id__in=task_ids)._raw_delete(TaskResult.objects.db)
+    tasks._raw_delete(tasks.db)
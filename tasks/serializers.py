@@ -1,3 +1,5 @@
+from collections.abc import Mapping
+
 from rest_framework import serializers
 from .models import Tenant, Task, TaskResult
 
@@ -9,32 +11,42 @@ class TenantSerializer(serializers.ModelSerializer):
 
 
 class TaskResultSerializer(serializers.ModelSerializer):
-	duration = serializers.SerializerMethodField()
+	duration = serializers.FloatField(source='duration_seconds', read_only=True)
 
 	class Meta:
 		model = TaskResult
 		fields = ['id', 'status', 'output', 'error_message', 'retry_count', 'started_at', 'completed_at', 'duration']
 
-	def get_duration(self, obj):
-		return obj.duration_seconds()
-
 
 class TaskSerializer(serializers.ModelSerializer):
 	dependencies = serializers.PrimaryKeyRelatedField(
-		many=True, queryset=Task.objects.all(), required=False
+		many=True, queryset=Task.objects.only('id'), required=False
 	)
 	results = TaskResultSerializer(many=True, read_only=True)
-	duration = serializers.SerializerMethodField()
+	duration = serializers.FloatField(source='duration_seconds', read_only=True)
 
 	class Meta:
 		model = Task
 		fields = ['id', 'title', 'description', 'workspace', 'dependencies', 'status', 'created_at', 'updated_at', 'started_at', 'completed_at', 'duration', 'results']
 
+	def get_fields(self):
+		"""Look dependencies up only among tasks in the same workspace."""
+		fields = super().get_fields()
+		workspace_id = None
+		if isinstance(getattr(self, 'initial_data', None), Mapping):
+			workspace_id = self.initial_data.get('workspace')
+		if workspace_id is None and isinstance(self.instance, Task):
+			workspace_id = self.instance.workspace_id
+		try:
+			workspace_id = int(workspace_id)
+		except (TypeError, ValueError):
+			# Missing or malformed; the workspace field reports the error
+			return fields
+		fields['dependencies'].child_relation.queryset = Task.objects.filter(workspace_id=workspace_id).only('id')
+		return fields
+
 	def to_representation(self, instance):
 		"""Return human-readable workspace key instead of ID."""
 		ret = super().to_representation(instance)
 		ret['workspace_key'] = instance.workspace.key
 		return ret
-
-	def get_duration(self, obj):
-		return obj.duration_seconds()
@@ -1,30 +1,53 @@
+import json
 import time
 import random
-from celery import shared_task
+from functools import lru_cache
+from celery import chain, group, shared_task
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.db import transaction
 from django.utils import timezone
 
+from .consumers import workspace_group
 from .models import Task, TaskResult
 
 
+@lru_cache(maxsize=None)
+def _group_send():
+	"""Return the default layer's group_send wrapped for sync callers.
+
+	The layer lookup and the async_to_sync wrapper are built once per worker
+	process rather than on every update.
+	"""
+	return async_to_sync(get_channel_layer().group_send)
+
+
+def _push(workspace_key, payload):
+	"""Broadcast a task update to a workspace group.
+
+	The payload travels only as its JSON frame, encoded here once, so
+	consumers forward it as-is and the layer carries a single copy of it.
+	"""
+	_group_send()(workspace_group(workspace_key), {
+		'type': 'task_update',
+		'frame': json.dumps(payload, separators=(',', ':')),
+	})
+
+
 @shared_task(bind=True, max_retries=3)
 def execute_task(self, task_id):
 	"""Execute a task with retry logic and result persistence."""
 	try:
-		task = Task.objects.get(pk=task_id)
+		# The workspace key is needed for every update pushed below
+		task = Task.objects.select_related('workspace').get(pk=task_id)
 	except Task.DoesNotExist:
 		return {'error': f'Task {task_id} not found'}
 
 	task.status = Task.STATUS_RUNNING
 	task.started_at = timezone.now()
-	task.save()
+	task.save(update_fields=['status', 'started_at', 'updated_at'])
 
-	channel_layer = get_channel_layer()
-	async_to_sync(channel_layer.group_send)(f'workspace_{task.workspace.key}', {
-		'type': 'task_update',
-		'payload': {'id': task.id, 'status': task.status},
-	})
+	_push(task.workspace.key, {'id': task.id, 'status': task.status})
 
 	try:
 		# Simulate work with random chance of failure for demo
@@ -35,21 +58,19 @@ def execute_task(self, task_id):
 		output = f'Task {task.id} completed successfully'
 		task.status = Task.STATUS_DONE
 		task.completed_at = timezone.now()
-		task.save()
-
-		# Record successful result
-		TaskResult.objects.create(
-			task=task,
-			status=TaskResult.STATUS_SUCCESS,
-			output=output,
-			completed_at=timezone.now(),
-			retry_count=self.request.retries
-		)
-
-		async_to_sync(channel_layer.group_send)(f'workspace_{task.workspace.key}', {
-			'type': 'task_update',
-			'payload': {'id': task.id, 'status': task.status, 'output': output},
-		})
+		task.duration = (task.completed_at - task.started_at).total_seconds()
+
+		# Status and result land together; clients hear about it after commit
+		with transaction.atomic():
+			task.save(update_fields=['status', 'completed_at', 'duration', 'updated_at'])
+			TaskResult.objects.create(
+				task=task,
+				status=TaskResult.STATUS_SUCCESS,
+				output=output,
+				completed_at=timezone.now(),
+				retry_count=self.request.retries
+			)
+			transaction.on_commit(lambda: _push(task.workspace.key, {'id': task.id, 'status': task.status, 'output': output}))
 
 		return {'task_id': task.id, 'status': 'success', 'output': output}
 
@@ -61,20 +82,32 @@ def execute_task(self, task_id):
 			# Max retries exceeded
 			task.status = Task.STATUS_FAILED
 			task.completed_at = timezone.now()
-			task.save()
+			task.duration = (task.completed_at - task.started_at).total_seconds()
 
 			error_msg = str(exc)
-			TaskResult.objects.create(
-				task=task,
-				status=TaskResult.STATUS_FAILURE,
-				error_message=error_msg,
-				completed_at=timezone.now(),
-				retry_count=self.request.retries
-			)
-
-			async_to_sync(channel_layer.group_send)(f'workspace_{task.workspace.key}', {
-				'type': 'task_update',
-				'payload': {'id': task.id, 'status': task.status, 'error': error_msg},
-			})
+			with transaction.atomic():
+				task.save(update_fields=['status', 'completed_at', 'duration', 'updated_at'])
+				TaskResult.objects.create(
+					task=task,
+					status=TaskResult.STATUS_FAILURE,
+					error_message=error_msg,
+					completed_at=timezone.now(),
+					retry_count=self.request.retries
+				)
+				transaction.on_commit(lambda: _push(task.workspace.key, {'id': task.id, 'status': task.status, 'error': error_msg}))
 
 			return {'task_id': task.id, 'status': 'failed', 'error': error_msg}
+
+
+def dispatch_levels(levels):
+	"""Enqueue topological levels so each level starts once the previous one finishes.
+
+	Tasks inside a level run in parallel; Celery turns the chain of groups into
+	one chord per level boundary. A level holding a single task is chained as
+	a plain signature, which needs no chord bookkeeping.
+	"""
+	return chain(*(
+		execute_task.si(level[0].id) if len(level) == 1
+		else group(execute_task.si(task.id) for task in level)
+		for level in levels
+	)).apply_async()
@@ -1,6 +1,23 @@
-from django.test import TestCase
-from tasks.models import Tenant, Task
-from tasks.utils import topological_sort
+import json
+import random
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+import msgpack
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.db.models import Prefetch, Q
+from django.test import TestCase, override_settings
+from tasks.consumers import WorkspaceConsumer, relay
+from tasks.management.commands.seed_expanded_data import Command as SeedExpandedData
+from tasks.management.commands.seed_production_scale import Command as SeedProductionScale
+from tasks.models import Tenant, Task, TaskResult
+from tasks.seeding import clear_tasks, get_or_create_tenants
+from tasks.serializers import TaskSerializer
+from tasks.tasks import _push
+from tasks.utils import pending_levels, topological_levels, topological_sort
 
 
 class DAGTests(TestCase):
@@ -53,3 +70,341 @@ class DAGTests(TestCase):
 
 		with self.assertRaises(ValueError):
 			topological_sort(tasks)
+
+	def test_dependency_outside_set_is_satisfied(self):
+		"""Test that sorting a subset ignores dependencies on tasks outside it."""
+		task_a = Task.objects.create(title='A', workspace=self.workspace, status=Task.STATUS_DONE)
+		task_b = Task.objects.create(title='B', workspace=self.workspace)
+		task_c = Task.objects.create(title='C', workspace=self.workspace)
+
+		task_b.dependencies.add(task_a)
+		task_c.dependencies.add(task_b)
+
+		tasks = list(Task.objects.filter(workspace=self.workspace, status=Task.STATUS_PENDING))
+		ordered = topological_sort(tasks)
+
+		self.assertEqual([t.id for t in ordered], [task_b.id, task_c.id])
+
+	def test_prefetched_dependencies_skip_edge_query(self):
+		"""Test that prefetched dependencies are sorted without another query."""
+		task_a = Task.objects.create(title='A', workspace=self.workspace)
+		task_b = Task.objects.create(title='B', workspace=self.workspace)
+		task_b.dependencies.add(task_a)
+
+		tasks = list(
+			Task.objects.filter(workspace=self.workspace)
+			.prefetch_related(Prefetch('dependencies', queryset=Task.objects.only('id')))
+		)
+		with self.assertNumQueries(0):
+			ordered = topological_sort(tasks)
+
+		self.assertEqual([t.id for t in ordered], [task_a.id, task_b.id])
+
+	def test_explicit_edges_skip_edge_query(self):
+		"""Test that caller-supplied edges are sorted without another query."""
+		task_a = Task.objects.create(title='A', workspace=self.workspace)
+		task_b = Task.objects.create(title='B', workspace=self.workspace)
+
+		tasks = list(Task.objects.filter(workspace=self.workspace))
+		with self.assertNumQueries(0):
+			ordered = topological_sort(tasks, edges=[(task_a.id, task_b.id)])
+
+		self.assertEqual([t.id for t in ordered], [task_b.id, task_a.id])
+
+	def test_diamond_levels(self):
+		"""Test that B and C share a level between A and D."""
+		task_a = Task.objects.create(title='A', workspace=self.workspace)
+		task_b = Task.objects.create(title='B', workspace=self.workspace)
+		task_c = Task.objects.create(title='C', workspace=self.workspace)
+		task_d = Task.objects.create(title='D', workspace=self.workspace)
+
+		task_b.dependencies.add(task_a)
+		task_c.dependencies.add(task_a)
+		task_d.dependencies.add(task_b, task_c)
+
+		levels = topological_levels(Task.objects.filter(workspace=self.workspace))
+
+		self.assertEqual(
+			[sorted(t.id for t in level) for level in levels],
+			[[task_a.id], sorted([task_b.id, task_c.id]), [task_d.id]],
+		)
+
+	def test_in_bulk_mapping_sorted(self):
+		"""Test that an in_bulk() id mapping sorts like a task list."""
+		task_a = Task.objects.create(title='A', workspace=self.workspace)
+		task_b = Task.objects.create(title='B', workspace=self.workspace)
+		task_a.dependencies.add(task_b)
+
+		nodes = Task.objects.in_bulk([task_a.id, task_b.id])
+
+		self.assertEqual([t.id for t in topological_sort(nodes)], [task_b.id, task_a.id])
+
+	def test_pending_levels_match_python_sort(self):
+		"""Test that pending_levels matches topological_levels on pending tasks."""
+		task_a = Task.objects.create(title='A', workspace=self.workspace, status=Task.STATUS_DONE)
+		task_b = Task.objects.create(title='B', workspace=self.workspace)
+		task_c = Task.objects.create(title='C', workspace=self.workspace)
+		task_d = Task.objects.create(title='D', workspace=self.workspace)
+		task_e = Task.objects.create(title='E', workspace=self.workspace)
+
+		task_b.dependencies.add(task_a)
+		task_c.dependencies.add(task_b)
+		task_d.dependencies.add(task_b, task_c)
+		task_e.dependencies.add(task_b)
+
+		pending = Task.objects.filter(workspace=self.workspace, status=Task.STATUS_PENDING)
+		self.assertEqual(
+			[sorted(t.id for t in level) for level in pending_levels(self.workspace)],
+			[sorted(t.id for t in level) for level in topological_levels(pending)],
+		)
+
+	def test_pending_levels_deep_chain_with_fan_in(self):
+		"""Test that a 200-task chain plus a fan-in task costs two queries and matches the Python sort."""
+		chain = Task.objects.bulk_create(Task(title=f'T{i}', workspace=self.workspace) for i in range(200))
+		sink = Task.objects.create(title='Sink', workspace=self.workspace)
+		Through = Task.dependencies.through
+		Through.objects.bulk_create(
+			[Through(from_task_id=task.id, to_task_id=dep.id) for dep, task in zip(chain, chain[1:])]
+			+ [Through(from_task_id=sink.id, to_task_id=dep.id) for dep in chain]
+		)
+
+		with self.assertNumQueries(2):
+			levels = pending_levels(self.workspace)
+
+		self.assertEqual(len(levels), 201)
+		self.assertEqual(levels[-1][0].id, sink.id)
+		pending = Task.objects.filter(workspace=self.workspace, status=Task.STATUS_PENDING)
+		self.assertEqual(
+			[[t.id for t in level] for level in levels],
+			[[t.id for t in level] for level in topological_levels(pending)],
+		)
+
+	def test_pending_levels_cycle_detection(self):
+		"""Test that pending_levels detects cycles, reachable or not."""
+		task_a = Task.objects.create(title='A', workspace=self.workspace)
+		task_b = Task.objects.create(title='B', workspace=self.workspace)
+		task_c = Task.objects.create(title='C', workspace=self.workspace)
+
+		task_b.dependencies.add(task_a, task_c)
+		task_c.dependencies.add(task_b)
+
+		with self.assertRaises(ValueError):
+			pending_levels(self.workspace)
+
+		task_b.dependencies.remove(task_a)
+		with self.assertRaises(ValueError):
+			pending_levels(self.workspace)
+
+	def test_dependency_from_other_workspace_rejected(self):
+		"""Test that a task cannot depend on a task in another workspace."""
+		other = Tenant.objects.create(key='other_workspace', name='Other')
+		foreign = Task.objects.create(title='X', workspace=other)
+		local = Task.objects.create(title='A', workspace=self.workspace)
+
+		serializer = TaskSerializer(data={'title': 'B', 'workspace': self.workspace.id, 'dependencies': [local.id, foreign.id]})
+
+		self.assertFalse(serializer.is_valid())
+		self.assertIn('dependencies', serializer.errors)
+
+
+class SeedingTests(TestCase):
+	"""Test the bulk helpers shared by the seed commands."""
+
+	def test_get_or_create_tenants(self):
+		"""Test that existing tenants are reused and only missing ones are created."""
+		existing = Tenant.objects.create(key='existing', name='Existing')
+
+		with self.assertNumQueries(3):
+			tenants, created = get_or_create_tenants([('existing', 'Renamed'), ('new', 'New')])
+
+		self.assertEqual(tenants['existing'], existing)
+		self.assertEqual(tenants['existing'].name, 'Existing')
+		self.assertIsNotNone(tenants['new'].pk)
+		self.assertEqual(created, {'new'})
+
+	def test_clear_tasks_removes_results_and_dependency_rows(self):
+		"""Test that clearing a workspace drops its results and M2M rows, and nothing else."""
+		workspace = Tenant.objects.create(key='cleared', name='Cleared')
+		other = Tenant.objects.create(key='kept', name='Kept')
+		task_a = Task.objects.create(title='A', workspace=workspace)
+		task_b = Task.objects.create(title='B', workspace=workspace)
+		kept = Task.objects.create(title='K', workspace=other)
+		task_b.dependencies.add(task_a)
+		kept.dependencies.add(task_b)
+		TaskResult.objects.create(task=task_a, status=TaskResult.STATUS_SUCCESS)
+		kept_result = TaskResult.objects.create(task=kept, status=TaskResult.STATUS_SUCCESS)
+
+		with self.assertNumQueries(3):
+			clear_tasks(Task.objects.filter(workspace=workspace))
+
+		Through = Task.dependencies.through
+		self.assertEqual(list(Task.objects.values_list('id', flat=True)), [kept.id])
+		self.assertEqual(list(TaskResult.objects.values_list('id', flat=True)), [kept_result.id])
+		self.assertFalse(Through.objects.exists())
+
+	def test_expansion_checks_each_workspace_for_its_own_sentinel(self):
+		"""Test that another workspace's sentinel title does not mark a workspace as expanded."""
+		ecommerce = Tenant.objects.create(key='ecommerce_pipeline', name='E-Commerce')
+		data = Tenant.objects.create(key='data_pipeline', name='Data')
+		Task.objects.create(title='Data Quality Checks', workspace=ecommerce)
+		Task.objects.create(title='Data Quality Checks', workspace=data)
+		command = SeedExpandedData(stdout=StringIO())
+
+		with self.assertNumQueries(2):
+			command.expand_existing_workspaces()
+		command.expand_existing_workspaces()
+
+		self.assertEqual(ecommerce.tasks.count(), 5)
+		self.assertTrue(ecommerce.tasks.filter(title='Notify Support Team').exists())
+		self.assertEqual(data.tasks.count(), 1)
+
+	def test_execution_history_of_exactly_one_full_batch(self):
+		"""Test that a result count that fills the last batch exactly leaves nothing to flush."""
+		workspace = Tenant.objects.create(key='batch', name='Batch')
+		Task.objects.bulk_create(Task(title=f'T{i}', workspace=workspace) for i in range(500))
+		choices = random.choices
+
+		def ten_runs_each(population, *args, **kwargs):
+			if population == range(5, 11):
+				return [10] * kwargs['k']
+			return choices(population, *args, **kwargs)
+
+		# PostgreSQL puts every row given into one batch
+		with patch('random.choices', ten_runs_each), \
+				patch.object(connection.ops, 'bulk_batch_size', lambda fields, objs: len(objs)):
+			SeedProductionScale(stdout=StringIO()).add_massive_execution_history()
+
+		self.assertEqual(TaskResult.objects.count(), 5000)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'trigram indexes are PostgreSQL-only')
+class SearchIndexTests(TestCase):
+	"""Test that task search can use the trigram expression indexes."""
+
+	def test_icontains_search_uses_trigram_indexes(self):
+		"""Test that title/description icontains is planned on the UPPER() indexes."""
+		workspace = Tenant.objects.create(key='search_workspace', name='Search')
+		Task.objects.bulk_create(Task(title=f'Task {i}', description=f'Step {i}', workspace=workspace) for i in range(50))
+
+		qs = Task.objects.filter(Q(title__icontains='ask 4') | Q(description__icontains='tep 4'))
+		with connection.cursor() as cursor:
+			cursor.execute('SET LOCAL enable_seqscan = off')
+		plan = qs.explain()
+
+		self.assertIn('tasks_task_title_upper_trgm', plan)
+		self.assertIn('tasks_task_description_upper_trgm', plan)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class WorkspaceConsumerTests(TestCase):
+	"""Test WebSocket delivery through the per-process group relay."""
+
+	async def connect(self, workspace='ws_test', subprotocols=None):
+		communicator = WebsocketCommunicator(
+			WorkspaceConsumer.as_asgi(), f'/ws/workspace/{workspace}/', subprotocols=subprotocols,
+		)
+		communicator.scope['url_route'] = {'kwargs': {'workspace': workspace}}
+		connected, subprotocol = await communicator.connect()
+		self.assertTrue(connected)
+		self.assertEqual(subprotocol, 'msgpack' if subprotocols else None)
+		return communicator
+
+	async def send_update(self, payload, workspace='ws_test'):
+		await get_channel_layer().group_send(f'workspace_{workspace}', {
+			'type': 'task_update',
+			'frame': json.dumps(payload, separators=(',', ':')),
+		})
+
+	def test_push_sends_only_the_json_frame(self):
+		"""Test that an update crosses the layer once, as its encoded frame."""
+		with patch('tasks.tasks._group_send') as group_send:
+			_push('ws_test', {'id': 1, 'status': 'done'})
+
+		group, message = group_send.return_value.call_args.args
+		self.assertEqual(group, 'workspace_ws_test')
+		self.assertEqual(message, {'type': 'task_update', 'frame': '{"id":1,"status":"done"}'})
+
+	async def test_two_sockets_share_one_subscription(self):
+		"""Test that both sockets on a group get each update from one relay channel."""
+		first = await self.connect()
+		second = await self.connect()
+		self.assertEqual(len(relay.readers), 1)
+
+		await self.send_update({'id': 1, 'status': 'done'})
+
+		self.assertEqual(await first.receive_json_from(timeout=1), {'id': 1, 'status': 'done'})
+		self.assertEqual(await second.receive_json_from(timeout=1), {'id': 1, 'status': 'done'})
+		await first.disconnect()
+		await second.disconnect()
+		self.assertEqual(relay.members, {})
+		self.assertEqual(relay.readers, {})
+
+	async def test_msgpack_sockets_share_one_packed_frame(self):
+		"""Test that msgpack sockets get binary frames packed once per update."""
+		first = await self.connect(subprotocols=['msgpack'])
+		second = await self.connect(subprotocols=['msgpack'])
+		text = await self.connect()
+
+		with patch('msgpack.packb', wraps=msgpack.packb) as packb:
+			await self.send_update({'id': 4, 'status': 'done'})
+			first_frame = await first.receive_output(timeout=1)
+			second_frame = await second.receive_output(timeout=1)
+			self.assertEqual(await text.receive_json_from(timeout=1), {'id': 4, 'status': 'done'})
+
+		self.assertEqual(packb.call_count, 1)
+		self.assertEqual(msgpack.unpackb(first_frame['bytes']), {'id': 4, 'status': 'done'})
+		self.assertEqual(second_frame['bytes'], first_frame['bytes'])
+		for communicator in (first, second, text):
+			await communicator.disconnect()
+
+	async def test_rejoin_after_last_socket_leaves(self):
+		"""Test that a group emptied by disconnects subscribes again on the next join."""
+		first = await self.connect()
+		await first.disconnect()
+		self.assertEqual(relay.readers, {})
+
+		second = await self.connect()
+		await self.send_update({'id': 2, 'status': 'running'})
+
+		self.assertEqual(await second.receive_json_from(timeout=1), {'id': 2, 'status': 'running'})
+		await second.disconnect()
+
+	async def test_failed_subscribe_does_not_leave_group_behind(self):
+		"""Test that a join whose group_add fails is rolled back and the next join subscribes."""
+		layer = get_channel_layer()
+		communicator = WebsocketCommunicator(WorkspaceConsumer.as_asgi(), '/ws/workspace/ws_test/')
+		communicator.scope['url_route'] = {'kwargs': {'workspace': 'ws_test'}}
+
+		with patch.object(layer, 'group_add', side_effect=ConnectionError('connection lost')):
+			with self.assertRaises(ConnectionError):
+				await communicator.connect()
+		self.assertEqual(relay.members, {})
+		self.assertEqual(relay.readers, {})
+
+		retry = await self.connect()
+		await self.send_update({'id': 5, 'status': 'done'})
+		self.assertEqual(await retry.receive_json_from(timeout=1), {'id': 5, 'status': 'done'})
+		await retry.disconnect()
+
+	async def test_reader_survives_receive_failure(self):
+		"""Test that a failed layer receive is logged and delivery resumes."""
+		communicator = await self.connect()
+		layer = get_channel_layer()
+		receive = layer.receive
+		failures = []
+
+		async def flaky_receive(channel):
+			if not failures:
+				failures.append(channel)
+				raise ConnectionError('connection lost')
+			return await receive(channel)
+
+		with patch.object(relay, 'retry_delay', 0), patch.object(layer, 'receive', flaky_receive), \
+				self.assertLogs('tasks.consumers', level='ERROR'):
+			await self.send_update({'id': 3, 'status': 'running'})
+			self.assertEqual(await communicator.receive_json_from(timeout=1), {'id': 3, 'status': 'running'})
+			await self.send_update({'id': 3, 'status': 'done'})
+			self.assertEqual(await communicator.receive_json_from(timeout=1), {'id': 3, 'status': 'done'})
+
+		self.assertEqual(len(failures), 1)
+		await communicator.disconnect()
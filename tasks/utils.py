@@ -1,34 +1,97 @@
-from collections import deque, defaultdict
+from collections.abc import Mapping
 
+from .models import Task
 
-def topological_sort(tasks):
+
+def _dependency_edges(tasks):
+    """Return (task_id, dependency_id) pairs between the given tasks.
+
+    Uses prefetched `dependencies` when every task has them, otherwise reads
+    the M2M table in one query.
+    """
+    ids = {t.id for t in tasks}
+    if all('dependencies' in getattr(t, '_prefetched_objects_cache', {}) for t in tasks):
+        return [(t.id, d.id) for t in tasks for d in t.dependencies.all() if d.id in ids]
+    return list(
+        Task.dependencies.through.objects
+        .filter(from_task_id__in=ids, to_task_id__in=ids)
+        .values_list('from_task_id', 'to_task_id')
+    )
+
+
+def topological_levels(tasks, edges=None):
+    """Group Task instances into levels that can run in parallel.
+
+    Level 0 holds tasks with no dependencies among `tasks`; every other task
+    is in the level after its last dependency. Raises ValueError on a cycle.
+    `tasks` may also be an {id: task} mapping such as QuerySet.in_bulk()
+    returns. `edges` may supply the (task_id, dependency_id) pairs directly;
+    pairs touching tasks outside `tasks` must already be left out.
+    """
+    if isinstance(tasks, Mapping):
+        ids = list(tasks)
+        tasks = list(tasks.values())
+    else:
+        tasks = list(tasks)
+        ids = [t.id for t in tasks]
+    if edges is None:
+        edges = _dependency_edges(tasks)
+
+    # Work on list positions rather than task ids: counts and adjacency are
+    # plain lists indexed by position, so the loops below do no hashing
+    position = {task_id: i for i, task_id in enumerate(ids)}
+    dep_count = [0] * len(tasks)
+    adj = [[] for _ in tasks]
+    for task_id, dep_id in edges:
+        i = position[task_id]
+        dep_count[i] += 1
+        adj[position[dep_id]].append(i)
+
+    frontier = [i for i, count in enumerate(dep_count) if count == 0]
+    levels = []
+    seen = 0
+
+    while frontier:
+        levels.append([tasks[i] for i in frontier])
+        seen += len(frontier)
+        ready = []
+        for i in frontier:
+            for j in adj[i]:
+                dep_count[j] -= 1
+                if dep_count[j] == 0:
+                    ready.append(j)
+        frontier = ready
+
+    if seen != len(tasks):
+        raise ValueError('Cycle detected in task dependencies')
+
+    return levels
+
+
+def topological_sort(tasks, edges=None):
     """Return a list of Task model instances in topological order.
 
     Raises ValueError if a cycle is detected.
-    Expects `tasks` to be an iterable of Task instances (prefetch dependencies for efficiency).
+    Expects `tasks` to be an iterable of Task instances (prefetch dependencies
+    to avoid the edge query). Dependencies on tasks outside `tasks` are treated
+    as already satisfied. `edges` is passed through to topological_levels.
     """
-    nodes = {t.id: t for t in tasks}
-    indegree = defaultdict(int)
-    adj = defaultdict(list)
-
-    for t in tasks:
-        deps = [d.id for d in t.dependencies.all()]
-        indegree[t.id] += len(deps)
-        for d in deps:
-            adj[d].append(t.id)
-
-    q = deque([nid for nid in nodes if indegree[nid] == 0])
-    result_ids = []
-
-    while q:
-        n = q.popleft()
-        result_ids.append(n)
-        for m in adj[n]:
-            indegree[m] -= 1
-            if indegree[m] == 0:
-                q.append(m)
-
-    if len(result_ids) != len(nodes):
-        raise ValueError('Cycle detected in task dependencies')
+    return [t for level in topological_levels(tasks, edges) for t in level]
+
 
-    return [nodes[i] for i in result_ids]
+def pending_levels(workspace):
+    """Return a workspace's pending tasks grouped into levels.
+
+    Same levels as topological_levels() over the pending tasks, read in two
+    queries: the pending ids as an in_bulk() mapping, and the dependency
+    pairs between pending tasks. Levels are then built in Python in
+    O(tasks + edges). The Task instances carry only `id`. Raises ValueError
+    on a cycle.
+    """
+    pending = Task.objects.filter(workspace=workspace, status=Task.STATUS_PENDING)
+    edges = (
+        Task.dependencies.through.objects
+        .filter(from_task_id__in=pending.values('id'), to_task_id__in=pending.values('id'))
+        .values_list('from_task_id', 'to_task_id')
+    )
+    return topological_levels(pending.only('id').order_by('id').in_bulk(), edges)
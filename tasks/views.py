@@ -1,14 +1,16 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Prefetch, Q, Avg, Count
+from django.db.models import Prefetch, Q, Avg, Count, Sum
 from django.views.generic import TemplateView
 
+from .metrics import ELAPSED
 from .models import Tenant, Task, TaskResult
 from .serializers import TenantSerializer, TaskSerializer, TaskResultSerializer
-import json
-from .utils import topological_sort
-from .tasks import execute_task
+import orjson
+from collections import defaultdict
+from .utils import pending_levels
+from .tasks import execute_task, dispatch_levels
 
 
 class TenantViewSet(viewsets.ModelViewSet):
@@ -25,7 +27,12 @@ class TaskViewSet(viewsets.ModelViewSet):
 		status_filter = self.request.query_params.get('status')
 		search = self.request.query_params.get('search')
 
-		qs = Task.objects.prefetch_related('dependencies', 'results').all()
+		# workspace is joined for the serializer's workspace_key; dependencies
+		# are only rendered as ids, so load nothing else for them
+		qs = Task.objects.select_related('workspace').prefetch_related(
+			Prefetch('dependencies', queryset=Task.objects.only('id')),
+			Prefetch('results', queryset=TaskResult.objects.order_by('-started_at')),
+		)
 
 		if workspace_key:
 			qs = qs.filter(workspace__key=workspace_key)
@@ -48,18 +55,17 @@ class TaskViewSet(viewsets.ModelViewSet):
 		except Tenant.DoesNotExist:
 			return Response({'error': 'Workspace not found'}, status=status.HTTP_404_NOT_FOUND)
 
-		tasks = list(Task.objects.filter(workspace=workspace, status=Task.STATUS_PENDING))
-		if not tasks:
-			return Response({'message': 'No pending tasks'}, status=status.HTTP_200_OK)
-
+		# Pending ids and their edges are read in two queries, whatever the DAG's shape
 		try:
-			ordered = topological_sort(tasks)
+			levels = pending_levels(workspace)
 		except ValueError as e:
 			return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+		if not levels:
+			return Response({'message': 'No pending tasks'}, status=status.HTTP_200_OK)
 
-		# Enqueue each task in topological order
-		for task in ordered:
-			execute_task.delay(task.id)
+		# Independent tasks in a level run in parallel; dependents wait for their level
+		dispatch_levels(levels)
+		ordered = [task for level in levels for task in level]
 
 		return Response({
 			'message': f'Enqueued {len(ordered)} tasks in DAG order',
@@ -85,34 +91,37 @@ class TaskViewSet(viewsets.ModelViewSet):
 		except Tenant.DoesNotExist:
 			return Response({'error': 'Workspace not found'}, status=status.HTTP_404_NOT_FOUND)
 
-		tasks = Task.objects.filter(workspace=workspace)
-		results = TaskResult.objects.filter(task__workspace=workspace)
-
-		total_duration = sum(
-			float(r.duration_seconds() or 0)
-			for r in results.filter(completed_at__isnull=False)
+		# Two conditional aggregates instead of one COUNT per status; durations
+		# are summed in SQL and only the final scalars become Python floats
+		task_stats = Task.objects.filter(workspace=workspace).aggregate(
+			total=Count('id'),
+			pending=Count('id', filter=Q(status=Task.STATUS_PENDING)),
+			running=Count('id', filter=Q(status=Task.STATUS_RUNNING)),
+			done=Count('id', filter=Q(status=Task.STATUS_DONE)),
+			failed=Count('id', filter=Q(status=Task.STATUS_FAILED)),
+		)
+		result_stats = TaskResult.objects.filter(task__workspace=workspace).aggregate(
+			success=Count('id', filter=Q(status=TaskResult.STATUS_SUCCESS)),
+			failure=Count('id', filter=Q(status=TaskResult.STATUS_FAILURE)),
+			retry=Count('id', filter=Q(status=TaskResult.STATUS_RETRY)),
+			total_duration=Sum(ELAPSED),
+			avg_duration=Avg(ELAPSED),
+			total_retries=Sum('retry_count'),
 		)
+		total_duration = result_stats['total_duration']
+		avg_duration = result_stats['avg_duration']
 
 		metrics = {
-			'total_tasks': tasks.count(),
-			'tasks_by_status': {
-				'pending': tasks.filter(status=Task.STATUS_PENDING).count(),
-				'running': tasks.filter(status=Task.STATUS_RUNNING).count(),
-				'done': tasks.filter(status=Task.STATUS_DONE).count(),
-				'failed': tasks.filter(status=Task.STATUS_FAILED).count(),
-			},
+			'total_tasks': task_stats.pop('total'),
+			'tasks_by_status': task_stats,
 			'execution_results': {
-				'success': results.filter(status=TaskResult.STATUS_SUCCESS).count(),
-				'failure': results.filter(status=TaskResult.STATUS_FAILURE).count(),
-				'retry': results.filter(status=TaskResult.STATUS_RETRY).count(),
+				'success': result_stats['success'],
+				'failure': result_stats['failure'],
+				'retry': result_stats['retry'],
 			},
-			'total_duration_seconds': total_duration,
-			'avg_task_duration': float(
-				(lambda ds: (sum(ds) / len(ds) if len(ds) else 0))([
-					float(r.duration_seconds() or 0) for r in results.filter(completed_at__isnull=False)
-				])
-			),
-			'total_retries': results.aggregate(Count('retry_count')).get('retry_count__count', 0),
+			'total_duration_seconds': total_duration.total_seconds() if total_duration else 0,
+			'avg_task_duration': avg_duration.total_seconds() if avg_duration else 0.0,
+			'total_retries': result_stats['total_retries'] or 0,
 		}
 
 		return Response(metrics)
@@ -128,13 +137,49 @@ class DashboardView(TemplateView):
 		workspaces = Tenant.objects.all()
 		tenants_data = TenantSerializer(workspaces, many=True).data
 
-		# include tasks (limit to a reasonable amount for initial render)
-		tasks_qs = Task.objects.prefetch_related('dependencies', 'results').all()[:500]
-		tasks_data = TaskSerializer(tasks_qs, many=True).data
-
-		# compute global metrics (across selected tasks)
-		results = TaskResult.objects.filter(task__in=tasks_qs)
-		total_duration = sum(float(r.duration_seconds() or 0) for r in results.filter(completed_at__isnull=False))
+		# include tasks (limit to a reasonable amount for initial render). The
+		# page only draws id, title, status, dependencies and duration, and
+		# replaces these rows with full API results on its first refresh, so
+		# plain rows are read instead of serializing model instances
+		rows = Task.objects.values_list(
+			'id', 'title', 'status', 'workspace__key', 'started_at', 'completed_at', 'duration'
+		)[:500]
+		task_ids = [row[0] for row in rows]
+		dependencies = defaultdict(list)
+		for task_id, dependency_id in (
+			Task.dependencies.through.objects
+			.filter(from_task_id__in=task_ids)
+			.values_list('from_task_id', 'to_task_id')
+			.iterator(chunk_size=2000)
+		):
+			dependencies[task_id].append(dependency_id)
+		tasks_data = [
+			{
+				'id': task_id,
+				'title': title,
+				'status': task_status,
+				'workspace_key': workspace_key,
+				'dependencies': dependencies[task_id],
+				'started_at': started_at,
+				'completed_at': completed_at,
+				'duration': duration if duration is not None else (
+					(completed_at - started_at).total_seconds() if started_at and completed_at else None
+				),
+			}
+			for task_id, title, task_status, workspace_key, started_at, completed_at, duration in rows
+		]
+
+		# compute global metrics (across selected tasks); one pass over the
+		# results gives the status counts and both duration figures
+		result_stats = TaskResult.objects.filter(task_id__in=task_ids).aggregate(
+			success=Count('id', filter=Q(status=TaskResult.STATUS_SUCCESS)),
+			failure=Count('id', filter=Q(status=TaskResult.STATUS_FAILURE)),
+			retry=Count('id', filter=Q(status=TaskResult.STATUS_RETRY)),
+			total_duration=Sum(ELAPSED),
+			avg_duration=Avg(ELAPSED),
+		)
+		total_duration = result_stats.pop('total_duration')
+		avg_duration = result_stats.pop('avg_duration')
 
 		metrics = {
 			'total_tasks': Task.objects.count(),
@@ -144,20 +189,13 @@ class DashboardView(TemplateView):
 				'done': Task.objects.filter(status=Task.STATUS_DONE).count(),
 				'failed': Task.objects.filter(status=Task.STATUS_FAILED).count(),
 			},
-			'execution_results': {
-				'success': results.filter(status=TaskResult.STATUS_SUCCESS).count(),
-				'failure': results.filter(status=TaskResult.STATUS_FAILURE).count(),
-				'retry': results.filter(status=TaskResult.STATUS_RETRY).count(),
-			},
-			'total_duration_seconds': total_duration,
-			'avg_task_duration': float(
-				(lambda ds: (sum(ds) / len(ds) if len(ds) else 0))([
-					float(r.duration_seconds() or 0) for r in results.filter(completed_at__isnull=False)
-				])
-			),
+			'execution_results': result_stats,
+			'total_duration_seconds': total_duration.total_seconds() if total_duration else 0,
+			'avg_task_duration': avg_duration.total_seconds() if avg_duration else 0.0,
 		}
 
-		ctx['initial_metrics_json'] = json.dumps(metrics)
-		ctx['initial_tasks_json'] = json.dumps(tasks_data)
-		ctx['initial_workspaces_json'] = json.dumps(tenants_data)
+		# orjson encodes the datetimes in tasks_data natively
+		ctx['initial_metrics_json'] = orjson.dumps(metrics).decode()
+		ctx['initial_tasks_json'] = orjson.dumps(tasks_data).decode()
+		ctx['initial_workspaces_json'] = orjson.dumps(tenants_data).decode()
 		return ctx
@@ -5,125 +5,181 @@ Usage: python verify_data.py
 """
 
 import os
+import sys
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
+from django.db import connection, transaction
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import Substr
+from django.test.utils import CaptureQueriesContext
+from tasks.metrics import ELAPSED
 from tasks.models import Tenant, Task, TaskResult
-from collections import defaultdict
 
-print("\n" + "="*70)
-print("FLOWSTATE DATA VERIFICATION")
-print("="*70 + "\n")
-
-# ========== WORKSPACE SUMMARY ==========
-print("📊 WORKSPACE SUMMARY\n")
-workspaces = Tenant.objects.all()
-print(f"Total Workspaces: {workspaces.count()}\n")
-
-for ws in workspaces:
-    tasks = ws.tasks.all()
-    results = TaskResult.objects.filter(task__workspace=ws)
+STATUS_EMOJI = {'pending': '⏳', 'running': '▶️', 'done': '✓', 'failed': '✗'}
+RESULT_EMOJI = {'success': '✓', 'failure': '✗', 'retry': '⟳'}
+# 20-cell distribution bars, indexed by filled cells (one per 5%)
+BARS = ["█" * i + "░" * (20 - i) for i in range(21)]
+# Queries the report issues, transaction statements included. Every section
+# runs a fixed number of queries whatever the data size (no per-row queries
+# and no chunked iterator() under a prefetch), so a higher count means a
+# section regressed rather than that the data grew
+MAX_QUERIES = 6
+
+# The report is collected here and written to stdout in one call at the end
+lines = []
+out = lines.append
+
+out("\n" + "="*70)
+out("FLOWSTATE DATA VERIFICATION")
+out("="*70 + "\n")
+
+# Every query below reads from one transaction, so the sections agree with
+# each other even if workers write while the report is built
+with CaptureQueriesContext(connection) as queries, transaction.atomic():
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+
+    # ========== WORKSPACE SUMMARY ==========
+    out("📊 WORKSPACE SUMMARY\n")
+    # Task, result and per-status counts for every workspace in one GROUP BY;
+    # the tenant -> task -> result join repeats task rows, hence DISTINCT.
+    # Every task and result belongs to a workspace, so the statistics below
+    # are sums of these rows and need no query of their own
+    workspaces = list(Tenant.objects.annotate(
+        n_tasks=Count('tasks', distinct=True),
+        n_results=Count('tasks__results', distinct=True),
+        n_pending=Count('tasks', filter=Q(tasks__status='pending'), distinct=True),
+        n_running=Count('tasks', filter=Q(tasks__status='running'), distinct=True),
+        n_done=Count('tasks', filter=Q(tasks__status='done'), distinct=True),
+        n_failed=Count('tasks', filter=Q(tasks__status='failed'), distinct=True),
+        n_success=Count('tasks__results', filter=Q(tasks__results__status='success'), distinct=True),
+        n_failure=Count('tasks__results', filter=Q(tasks__results__status='failure'), distinct=True),
+        n_retry=Count('tasks__results', filter=Q(tasks__results__status='retry'), distinct=True),
+    ).order_by('id'))
+    out(f"Total Workspaces: {len(workspaces)}\n")
+
+    for ws in workspaces:
+        status_counts = {
+            'pending': ws.n_pending,
+            'running': ws.n_running,
+            'done': ws.n_done,
+            'failed': ws.n_failed,
+        }
     
-    status_counts = defaultdict(int)
+        out(f"  🏢 {ws.name} ({ws.key})")
+        out(f"     Tasks: {ws.n_tasks} | Results: {ws.n_results}")
+        for status, count in status_counts.items():
+            if not count:
+                continue
+            emoji = STATUS_EMOJI.get(status, '•')
+            out(f"       {emoji} {status}: {count}")
+        out('')
+
+    # ========== TASK DAG VISUALIZATION ==========
+    out("\n" + "="*70)
+    out("📈 SAMPLE DAG: E-Commerce Pipeline")
+    out("="*70 + "\n")
+
+    # The workspace is matched by key in the same query, only the printed
+    # columns are selected, the duration is computed in SQL and dependency
+    # titles for every task arrive in one prefetch query. The queryset is
+    # not read with iterator(): that prefetches once per chunk, so the query
+    # count would grow with the workspace
+    tasks = (
+        Task.objects.filter(workspace__key='ecommerce_pipeline')
+        .only('title', 'description', 'status')
+        .annotate(elapsed=ELAPSED)
+        .order_by('id')
+        .prefetch_related(Prefetch('dependencies', queryset=Task.objects.only('title')))
+    )
+
     for task in tasks:
-        status_counts[task.status] += 1
-    
-    print(f"  🏢 {ws.name} ({ws.key})")
-    print(f"     Tasks: {tasks.count()} | Results: {results.count()}")
-    for status, count in status_counts.items():
-        emoji = {'pending': '⏳', 'running': '▶️', 'done': '✓', 'failed': '✗'}.get(status, '•')
-        print(f"       {emoji} {status}: {count}")
-    print()
-
-# ========== TASK DAG VISUALIZATION ==========
-print("\n" + "="*70)
-print("📈 SAMPLE DAG: E-Commerce Pipeline")
-print("="*70 + "\n")
-
-ecommerce = Tenant.objects.get(key='ecommerce_pipeline')
-tasks = ecommerce.tasks.all().order_by('id')
-
-for task in tasks:
-    deps = list(task.dependencies.values_list('title', flat=True))
-    deps_str = f" ← {', '.join(deps)}" if deps else ""
+        deps = [dep.title for dep in task.dependencies.all()]
+        deps_str = f" ← {', '.join(deps)}" if deps else ""
     
-    status_emoji = {
-        'pending': '⏳',
-        'running': '▶️',
-        'done': '✓',
-        'failed': '✗'
-    }.get(task.status, '•')
+        status_emoji = STATUS_EMOJI.get(task.status, '•')
     
-    duration = f" ({task.duration_seconds():.1f}s)" if task.duration_seconds() else ""
+        duration = f" ({task.elapsed.total_seconds():.1f}s)" if task.elapsed else ""
     
-    print(f"{status_emoji} Task {task.id}: {task.title}{duration}")
-    print(f"   └─ {task.description}{deps_str}\n")
-
-# ========== EXECUTION HISTORY ==========
-print("\n" + "="*70)
-print("📋 EXECUTION HISTORY")
-print("="*70 + "\n")
-
-results = TaskResult.objects.all().order_by('-started_at')[:10]
-for result in results:
-    status_emoji = {
-        'success': '✓',
-        'failure': '✗',
-        'retry': '⟳'
-    }.get(result.status, '•')
+        out(f"{status_emoji} Task {task.id}: {task.title}{duration}")
+        out(f"   └─ {task.description}{deps_str}\n")
+
+    # ========== EXECUTION HISTORY ==========
+    out("\n" + "="*70)
+    out("📋 EXECUTION HISTORY")
+    out("="*70 + "\n")
+
+    # The task's id and title are joined in; only the printed columns are read,
+    # and error messages are cut to the printed 60 characters in SQL
+    results = (
+        TaskResult.objects.select_related('task')
+        .only('status', 'retry_count', 'task__id', 'task__title')
+        .annotate(elapsed=ELAPSED, error_head=Substr('error_message', 1, 60))
+        .order_by('-started_at')[:10]
+    )
+    for result in results:
+        status_emoji = RESULT_EMOJI.get(result.status, '•')
     
-    duration = f"{result.duration_seconds():.2f}s" if result.duration_seconds() else "—"
+        duration = f"{result.elapsed.total_seconds():.2f}s" if result.elapsed else "—"
     
-    print(f"{status_emoji} Task {result.task.id}: {result.task.title}")
-    print(f"   Status: {result.status} | Duration: {duration} | Attempt: {result.retry_count + 1}")
-    if result.error_message:
-        print(f"   Error: {result.error_message[:60]}...")
-    print()
-
-# ========== STATISTICS ==========
-print("\n" + "="*70)
-print("📊 STATISTICS")
-print("="*70 + "\n")
-
-total_tasks = Task.objects.count()
-total_results = TaskResult.objects.count()
-
-task_stats = Task.objects.values('status').distinct()
-result_stats = TaskResult.objects.values('status').distinct()
-
-print(f"Total Tasks: {total_tasks}")
-print(f"Total Executions: {total_results}")
-print()
-
-print("Task Status Distribution:")
-for status in ['pending', 'running', 'done', 'failed']:
-    count = Task.objects.filter(status=status).count()
-    pct = (count / total_tasks * 100) if total_tasks > 0 else 0
-    bar = "█" * int(pct / 5) + "░" * (20 - int(pct / 5))
-    print(f"  {status:10} {count:3} [{bar}] {pct:5.1f}%")
-
-print("\nExecution Result Distribution:")
-success = TaskResult.objects.filter(status='success').count()
-failure = TaskResult.objects.filter(status='failure').count()
-retry = TaskResult.objects.filter(status='retry').count()
-
-print(f"  Success: {success}")
-print(f"  Failure: {failure}")
-print(f"  Retry:   {retry}")
-
-# Calculate success rate
-if total_results > 0:
-    success_rate = (success / total_results) * 100
-    print(f"\n  Success Rate: {success_rate:.1f}%")
-
-print("\n" + "="*70)
-print("\n✅ Data verification complete!")
-print("\nNext steps:")
-print("  1. Start Celery worker: celery -A core worker -l info")
-print("  2. Start Django dev server: python manage.py runserver")
-print("  3. Visit dashboard: http://localhost:8000")
-print("  4. Switch workspaces using the dropdown")
-print("  5. Click 'Execute DAG' to trigger task execution")
-print("\n" + "="*70 + "\n")
+        out(f"{status_emoji} Task {result.task.id}: {result.task.title}")
+        out(f"   Status: {result.status} | Duration: {duration} | Attempt: {result.retry_count + 1}")
+        if result.error_head:
+            out(f"   Error: {result.error_head}...")
+        out('')
+
+    # ========== STATISTICS ==========
+    out("\n" + "="*70)
+    out("📊 STATISTICS")
+    out("="*70 + "\n")
+
+    # Totals and status counts are summed from the workspace rows read above
+    task_counts = {
+        status: sum(getattr(ws, f'n_{status}') for ws in workspaces)
+        for status in ['pending', 'running', 'done', 'failed']
+    }
+    result_counts = {
+        status: sum(getattr(ws, f'n_{status}') for ws in workspaces)
+        for status in ['success', 'failure', 'retry']
+    }
+    total_tasks = sum(ws.n_tasks for ws in workspaces)
+    total_results = sum(ws.n_results for ws in workspaces)
+
+    out(f"Total Tasks: {total_tasks}")
+    out(f"Total Executions: {total_results}")
+    out('')
+
+    out("Task Status Distribution:")
+    for status in ['pending', 'running', 'done', 'failed']:
+        count = task_counts.get(status, 0)
+        pct = (count / total_tasks * 100) if total_tasks > 0 else 0
+        bar = BARS[min(int(pct / 5), 20)]
+        out(f"  {status:10} {count:3} [{bar}] {pct:5.1f}%")
+
+    out("\nExecution Result Distribution:")
+    for status in ['success', 'failure', 'retry']:
+        out(f"  {status.capitalize() + ':':8} {result_counts.get(status, 0)}")
+
+    # Calculate success rate
+    if total_results > 0:
+        success_rate = (result_counts.get('success', 0) / total_results) * 100
+        out(f"\n  Success Rate: {success_rate:.1f}%")
+
+out("\n" + "="*70)
+out("\n✅ Data verification complete!")
+out("\nNext steps:")
+out("  1. Start Celery worker: celery -A core worker -l info")
+out("  2. Start Django dev server: python manage.py runserver")
+out("  3. Visit dashboard: http://localhost:8000")
+out("  4. Switch workspaces using the dropdown")
+out("  5. Click 'Execute DAG' to trigger task execution")
+out("\n" + "="*70 + "\n")
+
+sys.stdout.write('\n'.join(lines) + '\n')
+
+if len(queries) > MAX_QUERIES:
+    sys.exit(f"verify_data.py used {len(queries)} queries, expected at most {MAX_QUERIES}")